@@ -0,0 +1,213 @@
+"""
+Admission control for the expensive API routes
+
+A burst of full listings or stats aggregates can take every worker thread
+and every pooled database connection, so cheap point reads
+(GET /api/contacts/{id}) end up waiting behind them. Expensive routes are
+declared with a concurrency limit and a bounded queue:
+
+- up to `concurrency` requests of the route run at once
+- up to `queue` more wait for a slot, at most `timeout` seconds
+- beyond that, the request is refused at once with 503 and Retry-After
+
+Routes without a rule (point reads, writes, the event stream) are never
+queued, which is what gives them priority. Queue wait times are kept per
+route for GET /api/admin/admission.
+"""
+import asyncio
+import collections
+import math
+import time
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+
+class Rejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[max(index, 0)]
+
+
+class Limiter:
+    """Concurrency limit with a bounded FIFO queue (use from the event loop only)"""
+
+    def __init__(self, concurrency, queue, timeout=2.0, samples=1000):
+        """
+        Args:
+            concurrency (int): Requests running at the same time
+            queue (int): Requests allowed to wait for a slot
+            timeout (float): Maximum wait (s) in the queue
+            samples (int): Recent wait times kept for the percentiles
+        """
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = collections.deque()
+        self._waits = collections.deque(maxlen=samples)
+        # Moving average of the time a request holds its slot, for Retry-After
+        self._service_time = 0.1
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timedOut": 0}
+
+    def retry_after(self):
+        """Seconds after which a refused client may retry: time to drain the queue"""
+        backlog = len(self._waiters) + self.active
+        return max(1, math.ceil(self._service_time * backlog / self.concurrency))
+
+    async def acquire(self):
+        """
+        Wait for a slot
+
+        Returns:
+            float: Time spent in the queue (s)
+
+        Raises:
+            Rejected: If the queue is full or the wait timed out
+        """
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._record(0.0)
+            return 0.0
+        if len(self._waiters) >= self.queue:
+            self.stats["rejected"] += 1
+            raise Rejected("queue full", self.retry_after())
+
+        self.stats["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["timedOut"] += 1
+            raise Rejected("queue wait timed out", self.retry_after())
+        wait = time.perf_counter() - start
+        self._record(wait)
+        return wait
+
+    def release(self, service_time=None):
+        """Free a slot, handing it to the oldest waiter if any"""
+        if service_time is not None:
+            self._service_time += 0.2 * (service_time - self._service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the waiter: active is unchanged
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _record(self, wait):
+        self.stats["admitted"] += 1
+        self._waits.append(wait)
+
+    def status(self):
+        waits = sorted(self._waits)
+        return {
+            "concurrency": self.concurrency,
+            "queue": self.queue,
+            "timeout": self.timeout,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            **self.stats,
+            # Queue wait of the recently admitted requests, in milliseconds
+            "waitMs": {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in (
+                    ("p50", _percentile(waits, 0.50)),
+                    ("p95", _percentile(waits, 0.95)),
+                    ("p99", _percentile(waits, 0.99)),
+                    ("max", waits[-1] if waits else None),
+                )
+            },
+        }
+
+
+class AdmissionControl:
+    """Limiters of the expensive routes, keyed by (method, path)"""
+
+    def __init__(self):
+        self.limiters = {}
+        self._routes = {}
+
+    def add_rule(self, name, method, path, concurrency, queue, timeout=2.0, when=None):
+        """
+        Limit a route
+
+        Args:
+            name (str): Name of the limiter in the status
+            method (str): HTTP method
+            path (str): Exact route path, without the tenant prefix
+            when: Optional predicate on the query parameters (dict of lists):
+                  the limit only applies to the requests it accepts
+        """
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            limiter = self.limiters[name] = Limiter(concurrency, queue, timeout)
+        self._routes[(method.upper(), path)] = (limiter, when)
+
+    def limiter_for(self, method, path, query_string=b""):
+        limiter, when = self._routes.get((method, path), (None, None))
+        if limiter is not None and when is not None:
+            if not when(parse_qs(query_string.decode("latin-1"))):
+                return None
+        return limiter
+
+    def status(self):
+        return {name: limiter.status() for name, limiter in self.limiters.items()}
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionControl to HTTP requests"""
+
+    def __init__(self, app, control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # Route path, without the root path (e.g. the /t/{tenant} prefix)
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        limiter = self.control.limiter_for(scope["method"], path, scope.get("query_string", b""))
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            response = JSONResponse(
+                {"detail": f"Server busy ({e.reason}), retry later"},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            return await response(scope, receive, send)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
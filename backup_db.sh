@@ -48,8 +48,10 @@ log_info "Démarrage de la sauvegarde..."
 log_info "Base source: $DB_FILE"
 log_info "Destination: $BACKUP_FILE"
 
-# Copier la base de données
-if cp "$DB_FILE" "$BACKUP_FILE"; then
+# Copier la base de données (API de sauvegarde SQLite : inclut le contenu du
+# journal WAL, qu'une simple copie du fichier manquerait)
+# Note : l'application fait déjà une sauvegarde quotidienne (maintenance.py)
+if python3 -c "import sqlite3, sys; sqlite3.connect(sys.argv[1]).backup(sqlite3.connect(sys.argv[2]))" "$DB_FILE" "$BACKUP_FILE"; then
     # Obtenir la taille du fichier
     SIZE=$(du -h "$BACKUP_FILE" | cut -f1)
     log_info "✅ Sauvegarde réussie!"
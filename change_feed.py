@@ -0,0 +1,131 @@
+"""
+In-process change feed behind the Server-Sent Events endpoint (GET /api/changes)
+
+Write endpoints publish compact notifications per tenant (contact created,
+updated or deleted, new stats values); each open event stream reads them from its
+own bounded queue. The last events of each tenant are kept so a client
+reconnecting with Last-Event-ID receives what it missed, or a "resync"
+event when it is too far behind (or the server restarted) and must reload.
+
+Notifications only reach streams served by the same process.
+"""
+import asyncio
+import collections
+import itertools
+import json
+import time
+
+
+class _Subscriber:
+    """Queue of one event stream; remembers when it overflowed"""
+
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """Publish/subscribe of change notifications, per tenant"""
+
+    def __init__(self, history_size=500, queue_size=256, heartbeat=15.0):
+        """
+        Args:
+            history_size (int): Events kept per tenant for Last-Event-ID replays
+            queue_size (int): Events buffered per stream before it must resync
+            heartbeat (float): Seconds between keep-alive comments on idle streams
+        """
+        # Event ids are "<epoch>-<seq>": ids from before a restart are recognized
+        self.epoch = format(int(time.time()), "x")
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        # One sequence per tenant, like the history: a tenant's ids have no
+        # gaps, so a gap before the oldest kept event means events were lost
+        self._sequences = {}  # tenant -> itertools.count
+        self._history = {}  # tenant -> deque of (seq, event, data)
+        self._subscribers = {}  # tenant -> set of _Subscriber
+
+    def publish(self, tenant, event, data):
+        """
+        Send an event to the tenant's streams (call from the event loop)
+
+        Args:
+            tenant (str): Tenant whose streams receive the event
+            event (str): Event name ("contact", "stats", ...)
+            data: JSON-serializable payload
+        """
+        history = self._history.get(tenant)
+        if history is None:
+            history = self._history[tenant] = collections.deque(maxlen=self.history_size)
+            self._sequences[tenant] = itertools.count(1)
+        message = (next(self._sequences[tenant]), event, json.dumps(data, ensure_ascii=False))
+        history.append(message)
+        for subscriber in self._subscribers.get(tenant, ()):
+            subscriber.put(message)
+
+    def has_subscribers(self, tenant):
+        return bool(self._subscribers.get(tenant))
+
+    def subscriber_count(self):
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _format(self, message):
+        seq, event, data = message
+        return f"id: {self.epoch}-{seq}\nevent: {event}\ndata: {data}\n\n"
+
+    def _missed(self, tenant, last_event_id):
+        """Events after last_event_id, or None if some of them are no longer available"""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        last = int(seq)
+        history = self._history.get(tenant, ())
+        if len(history) == self.history_size and history[0][0] > last + 1:
+            return None
+        return [message for message in history if message[0] > last]
+
+    async def stream(self, tenant, last_event_id=None):
+        """
+        Async generator of Server-Sent Events for a tenant
+
+        Args:
+            tenant (str): Tenant to follow
+            last_event_id (str): Last-Event-ID header of a reconnecting client
+        """
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers.setdefault(tenant, set()).add(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id:
+                missed = self._missed(tenant, last_event_id)
+                if missed is None:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    for message in missed:
+                        yield self._format(message)
+
+            while True:
+                if subscriber.overflowed:
+                    # Too slow to keep up: drop the backlog, the client reloads
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield self._format(message)
+        finally:
+            subscribers = self._subscribers.get(tenant)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[tenant]
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Vérification des plans d'exécution des requêtes SQL de l'API et des scripts
+
+Crée une base temporaire peuplée de contacts, exécute les appels de l'API
+et des scripts d'import/export, capture chaque requête SQL émise puis lance
+EXPLAIN QUERY PLAN dessus. Échoue (code 1) si une requête chaude fait un
+parcours complet de table (SCAN, y compris dans l'ordre d'un index, sauf
+une page sans filtre arrêtée par LIMIT) ou un tri temporaire (USE TEMP
+B-TREE), sauf pour les scénarios explicitement autorisés. Une autorisation
+qu'aucun plan n'utilise plus fait aussi échouer la vérification.
+
+Usage:
+    python check_query_plans.py
+    python check_query_plans.py --verbose
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import threading
+
+# The database URL is read when database.py is imported: point it to a
+# temporary file before importing anything from the application
+_TMP_DIR = tempfile.mkdtemp(prefix="crm-query-plans-")
+os.environ["CRM_DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/contacts.db"
+
+from sqlalchemy import event  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from contact_store import sync_contact  # noqa: E402
+from database import engine, SessionLocal, Contact, init_db  # noqa: E402
+from export_contact import export_contact_to_yaml, export_all_contacts, list_contacts  # noqa: E402
+from import_contact import import_contact_from_yaml  # noqa: E402
+from import_bulk import import_contacts  # noqa: E402
+
+SEED_CONTACTS = 300
+
+# Plan lines that indicate a regression. A full scan reads every row of a
+# table, whether in rowid order ("SCAN contacts") or in index order
+# ("SCAN contacts USING [COVERING] INDEX ..."); scans of virtual tables
+# (json_each over one value) and of subquery results are not table scans.
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+TEMP_BTREE_RE = re.compile(r"USE TEMP B-TREE")
+
+
+class StatementRecorder:
+    """Collects the SQL statements executed on the engine"""
+
+    def __init__(self):
+        self.statements = []
+        self.active = False
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.active or executemany:
+            return
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            with self._lock:
+                self.statements.append((statement, parameters))
+
+    @contextlib.contextmanager
+    def capture(self):
+        with self._lock:
+            self.statements = []
+        self.active = True
+        try:
+            yield self
+        finally:
+            self.active = False
+
+
+def explain(statement, parameters):
+    """Return the plan detail lines of a statement"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in rows]
+
+
+def is_bounded(statement):
+    """Unfiltered statement with a LIMIT: an index-order scan stops after offset + limit rows"""
+    words = statement.upper().split()
+    return "LIMIT" in words and "WHERE" not in words
+
+
+def plan_problems(plan, statement, allowed=()):
+    """
+    Return the (plan line, kind) pairs that are full table scans ("scan")
+    or temp sorts ("sort"), except for the allowed kinds
+    """
+    problems = []
+    for detail in plan:
+        if FULL_SCAN_RE.match(detail) and not is_bounded(statement):
+            kind = "scan"
+        elif TEMP_BTREE_RE.search(detail):
+            kind = "sort"
+        else:
+            continue
+        if kind not in allowed:
+            problems.append((detail, kind))
+    return problems
+
+
+def seed_database():
+    """Create the schema and SEED_CONTACTS contacts, then ANALYZE"""
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(SEED_CONTACTS):
+            contact = Contact(
+                contactId=f"seed-{i:05d}",
+                name=f"Contact {i:05d}",
+                email=f"contact{i}@example.com",
+                phone=f"+3360000{i:04d}",
+                company=f"Company {i % 20}",
+                position="Director",
+                events=(
+                    f'[{{"date": "2026-0{1 + i % 9}-10T10:00:00Z", "type": "call", "notes": "n"}},'
+                    f' {{"date": "2019-01-0{1 + i % 9}", "type": "meeting", "notes": "old"}}]'
+                ),
+                importantNotes='["note"]',
+                nextActions=f'[{{"action": "a", "dueDate": "2026-1{i % 3}-01"}}]',
+                opportunities=f'[{{"project": "p", "estimatedValue": {i * 100}}}]'
+            )
+            sync_contact(db, contact)
+            db.add(contact)
+        db.commit()
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def build_scenarios(client, yaml_file, csv_file):
+    """
+    List of (name, callable, allowance) tuples
+
+    allowance is None for hot queries, or (kinds, reason) where kinds is a
+    tuple of "scan" (full table scan) and/or "sort" (temp B-tree) and
+    reason explains why the scenario may do it.
+    """
+    contact_id = "seed-00042"
+
+    def cli(fn, *args, **kwargs):
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                fn(*args, **kwargs)
+        return run
+
+    def get(url, **params):
+        return lambda: client.get(url, params=params).raise_for_status()
+
+    def created_contact():
+        response = client.post("/api/contacts", json={
+            "name": "Plan Check",
+            "events": [{"date": "2026-10-01", "type": "call", "notes": "n"}]
+        })
+        response.raise_for_status()
+        new_id = response.json()["contactId"]
+        client.put(f"/api/contacts/{new_id}", json={"position": "CEO"}).raise_for_status()
+        client.delete(f"/api/contacts/{new_id}").raise_for_status()
+
+    return [
+        ("GET /api/contacts (page)", get("/api/contacts", limit=50, offset=100), None),
+        ("GET /api/contacts sort=-lastEventAt", get("/api/contacts", sort="-lastEventAt", limit=50), None),
+        ("GET /api/contacts sort=nextDueDate", get("/api/contacts", sort="nextDueDate", limit=50), None),
+        ("GET /api/contacts sort=-opportunityValue", get("/api/contacts", sort="-opportunityValue", limit=50), None),
+        ("GET /api/contacts sort=eventCount", get("/api/contacts", sort="eventCount", limit=50), None),
+        ("GET /api/contacts sort=name", get("/api/contacts", sort="name", limit=50), None),
+        ("GET /api/contacts minValue", get("/api/contacts", minValue=25000, sort="-opportunityValue"), None),
+        ("GET /api/contacts dueFrom/dueTo", get("/api/contacts", dueFrom="2026-11-01", dueTo="2026-11-02", sort="nextDueDate"), None),
+        ("GET /api/contacts filter company", get("/api/contacts", filter='company = "Company 3"', sort="name"),
+         (("sort",), "the matching subset is sorted after the indexed filter")),
+        ("GET /api/contacts filter events.type", get("/api/contacts", filter="events.type = call and events.date >= 2026-09-01"),
+         (("sort",), "the matching subset is sorted after the indexed filter")),
+        ("GET /api/contacts filter nextActions.dueDate <", get("/api/contacts", filter="nextActions.dueDate < 2026-11-01", sort="nextDueDate"), None),
+        ("GET /api/contacts search", get("/api/contacts", search="contact 0004", limit=50),
+         (("scan",), "substring search (LIKE '%...%') cannot use an index; prefix lookups go through /api/contacts/suggest")),
+        ("GET /api/contacts filter opportunities.estimatedValue", get("/api/contacts", filter="opportunities.estimatedValue > 1000"),
+         (("scan",), "json_each() over a JSON column has no index; combine with an indexed field to narrow it")),
+        ("GET /api/contacts filter events.notes", get("/api/contacts", filter='events.notes ~ "devis"'),
+         (("scan",), "notes are read from the events JSON and the archive chunks, not copied to contact_events")),
+        ("GET /api/contacts (full list)", get("/api/contacts"),
+         (("scan",), "unpaginated listing reads every contact by design")),
+        ("GET /api/contacts/{id}", get(f"/api/contacts/{contact_id}"), None),
+        ("GET /api/contacts/{id}?include_archived", get(f"/api/contacts/{contact_id}", include_archived=True), None),
+        ("GET /api/contacts/{id}/events/archive", get(f"/api/contacts/{contact_id}/events/archive", limit=10), None),
+        ("POST /api/contacts/batch-get", lambda: client.post("/api/contacts/batch-get", json={
+            "contactIds": [f"seed-{i:05d}" for i in range(0, 300, 7)] + ["missing"], "fields": ["name"]
+        }).raise_for_status(), None),
+        ("GET /api/events", get("/api/events", limit=50), None),
+        ("GET /api/events from/to/type", get("/api/events", **{"from": "2026-03-01", "to": "2026-04-01", "type": "call"}), None),
+        ("GET /api/events cursor", get("/api/events", cursor="2026-05-10T10:00:00|100", limit=50), None),
+        ("POST/PUT/DELETE /api/contacts", created_contact, None),
+        ("archive (maintenance)", lambda: main.archive_events(main.DEFAULT_TENANT), None),
+        ("GET /api/stats", get("/api/stats"),
+         (("scan",), "aggregates over every contact by design (summary columns, no JSON decoding)")),
+        ("export_contact.py <nom exact>", cli(export_contact_to_yaml, "Contact 00042", os.path.join(_TMP_DIR, "c.yaml")), None),
+        ("export_contact.py <nom partiel>", cli(export_contact_to_yaml, "00042", os.path.join(_TMP_DIR, "c.yaml")),
+         (("scan",), "partial-name fallback is a substring match (ILIKE '%...%')")),
+        ("export_contact.py --list", cli(list_contacts),
+         (("scan",), "lists every contact by design, in name index order")),
+        ("export_contact.py --all", cli(export_all_contacts, os.path.join(_TMP_DIR, "exports")),
+         (("scan",), "exports every contact by design, in name index order")),
+        ("import_contact.py (par ID)", cli(import_contact_from_yaml, yaml_file), None),
+        ("import_contact.py (par nom)", cli(import_contact_from_yaml, yaml_file + ".by-name.yaml"), None),
+        ("import_bulk.py (CSV)", cli(import_contacts, csv_file), None),
+    ]
+
+
+def main_check(verbose=False):
+    seed_database()
+    recorder = StatementRecorder()
+
+    yaml_file = os.path.join(_TMP_DIR, "import.yaml")
+    with open(yaml_file, "w", encoding="utf-8") as f:
+        f.write('contactId: seed-00007\nname: Contact 00007\nposition: CTO\n')
+    with open(yaml_file + ".by-name.yaml", "w", encoding="utf-8") as f:
+        f.write('name: contact 00008\nposition: CFO\n')
+    csv_file = os.path.join(_TMP_DIR, "import.csv")
+    with open(csv_file, "w", encoding="utf-8") as f:
+        f.write('contactId,name,email,phone\nseed-00009,Contact 00009,,\n,Contact 10,CONTACT10@example.com,\n'
+                ',Contact 11,,+33600000011\n,New Contact,new@example.com,+33611111111\n')
+
+    failures = 0
+    with TestClient(main.app) as client:
+        # Let the startup upgrade of the database finish first
+        main.submit_startup_jobs(main.DEFAULT_TENANT).join()
+
+        scenarios = build_scenarios(client, yaml_file, csv_file)
+        print(f"\n🔍 Vérification des plans d'exécution ({len(scenarios)} scénarios)")
+        print("─" * 60)
+
+        for name, run, allowance in scenarios:
+            allowed, reason = allowance or ((), None)
+            with recorder.capture():
+                run()
+                # Writes are applied by the writer thread: wait for them
+                main.write_queue.submit(lambda db: None, key=main.DEFAULT_TENANT).result()
+            statements = list(dict.fromkeys(
+                (statement, tuple(parameters)) for statement, parameters in recorder.statements
+            ))
+
+            problems = []
+            allowed_hits = set()
+            for statement, parameters in statements:
+                plan = explain(statement, parameters)
+                bad = [detail for detail, _ in plan_problems(plan, statement, allowed)]
+                if bad:
+                    problems.append((statement, plan, bad))
+                allowed_hits.update(kind for _, kind in plan_problems(plan, statement))
+                if verbose:
+                    print(f"    {' '.join(statement.split())[:100]}")
+                    for detail in plan:
+                        print(f"      {detail}")
+            # An allowance the plans no longer need would hide a future regression
+            unused = [kind for kind in allowed if kind not in allowed_hits]
+
+            if problems or unused:
+                failures += 1
+                print(f"  ❌ {name}")
+                if unused:
+                    print(f"      autorisation inutilisée ({', '.join(unused)}) : à retirer du scénario")
+                for statement, plan, bad in problems:
+                    print(f"      SQL  : {' '.join(statement.split())}")
+                    for detail in plan:
+                        marker = "→" if detail in bad else " "
+                        print(f"      {marker} {detail}")
+            elif allowed:
+                print(f"  ⚠️  {name} : autorisé ({', '.join(allowed)}) — {reason}")
+            else:
+                print(f"  ✅ {name} ({len(statements)} requête(s))")
+
+    print("─" * 60)
+    if failures:
+        print(f"\n❌ {failures} scénario(s) avec parcours complet ou tri temporaire")
+        return 1
+    print("\n✅ Aucun parcours complet ni tri temporaire sur les requêtes chaudes")
+    return 0
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(
+        description="Vérifie les plans d'exécution (EXPLAIN QUERY PLAN) des requêtes de l'API et des scripts"
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Afficher chaque requête et son plan'
+    )
+    args = parser.parse_args()
+    return main_check(verbose=args.verbose)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,77 @@
+"""
+Compression of the large JSON text columns (Contact.events, Contact.importantNotes)
+
+Values at least COMPRESS_MIN_BYTES long (UTF-8) are stored as BLOBs:
+
+    b"Z" + dictionary version (1 byte) + raw deflate stream
+
+compressed with a zlib preset dictionary holding the JSON skeleton and the
+vocabulary of our notes, so even a few hundred bytes compress well. Smaller
+values stay plain TEXT, as do rows written before compression existed:
+readers accept both. A new dictionary gets a new version byte; older ones
+must stay in DICTIONARIES for as long as values use them.
+"""
+import os
+import zlib
+
+# Values shorter than this (bytes) are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("CRM_COMPRESS_MIN_BYTES", "512"))
+COMPRESS_LEVEL = 6
+
+MAGIC = b"Z"
+
+# Preset dictionary v1. zlib finds matches anywhere in it but references to
+# the end are cheapest: the most common strings come last.
+_DICTIONARY_V1 = "".join((
+    # Vocabulary of call notes and important notes
+    "Budget validé, décision attendue avant la fin du trimestre. ",
+    "Intéressé par notre solution, demande une démonstration. ",
+    "Envoyer la proposition commerciale et le devis. ",
+    "Relance prévue la semaine prochaine. Rendez-vous confirmé. ",
+    "Points abordés : besoins, calendrier, équipe, déploiement, contrat. ",
+    "Discussion about the project, pricing and next steps. ",
+    "Follow-up call scheduled. Sent the proposal. Meeting with the team. ",
+    "Disponible uniquement le matin. Préfère être contacté par email. ",
+    "le client souhaite une réponse rapide concernant les conditions ",
+    "appel réunion déjeuner visite salon présentation démo relance ",
+    "call meeting email lunch visit demo ",
+    # JSON layout of json.dumps(..., ensure_ascii=False)
+    '"}, {"date": "2025-', '"}, {"date": "2026-',
+    '", "type": "email", "notes": "', '", "type": "meeting", "notes": "',
+    '", "type": "call", "notes": "', '", "', '"]',
+    '[{"date": "2026-01-15T10:00:00Z", "type": "call", "notes": "',
+)).encode("utf-8")
+
+DICTIONARIES = {1: _DICTIONARY_V1}
+CURRENT_DICTIONARY = 1
+
+
+def compress_text(value):
+    """
+    Encode a JSON text for storage
+
+    Returns:
+        str or bytes: value itself when below the threshold, else the compressed BLOB
+    """
+    if value is None:
+        return None
+    data = value.encode("utf-8")
+    if len(data) < COMPRESS_MIN_BYTES:
+        return value
+    compressor = zlib.compressobj(
+        COMPRESS_LEVEL, zlib.DEFLATED, -15, zdict=DICTIONARIES[CURRENT_DICTIONARY])
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) + 2 >= len(data):
+        return value
+    return MAGIC + bytes((CURRENT_DICTIONARY,)) + compressed
+
+
+def decompress_text(value):
+    """Decode a stored value (TEXT or compressed BLOB) back to its JSON text"""
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+    value = bytes(value)
+    if value[:1] != MAGIC:
+        raise ValueError("Unknown compressed value format")
+    decompressor = zlib.decompressobj(-15, zdict=DICTIONARIES[value[1]])
+    return (decompressor.decompress(value[2:]) + decompressor.flush()).decode("utf-8")
@@ -0,0 +1,437 @@
+"""
+Write-side helpers shared by the API and the CLI scripts
+
+Every code path that writes a contact calls sync_contact() once the JSON
+columns are set, and purge_contact() before deleting it, so derived data
+stays consistent whichever script performed the write.
+"""
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import LargeBinary, and_, bindparam, cast, func, inspect, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+
+from compression import COMPRESS_MIN_BYTES
+from database import Contact, ContactEvent, EventArchive, normalize_event_date, normalize_phone, parse_event_date
+
+# Events older than this are moved to the event_archive table
+EVENT_ARCHIVE_AGE_DAYS = int(os.getenv("CRM_EVENT_ARCHIVE_AGE_DAYS", "365"))
+
+
+def _sort_key(event):
+    return parse_event_date(event.get("date")) or datetime.min
+
+
+def sort_events(events):
+    """Events newest first, in a fixed order (ties broken by type, then notes)"""
+    return sorted(events, key=lambda e: (_sort_key(e), e.get("type") or "", e.get("notes") or ""), reverse=True)
+
+
+def _event_key(event):
+    return normalize_event_date(event.get("date")), event.get("type"), event.get("notes")
+
+
+def _archived_event_keys(db, contact, events):
+    """(date, type, notes) of the contact's archived events that may match events"""
+    if not contact.archivedEventCount:
+        return set()
+    dates = {normalize_event_date(event.get("date")) for event in events}
+    # Only decompress the archive when some archived event has one of these dates
+    if db.query(ContactEvent.id).filter(
+        ContactEvent.contactId == contact.contactId,
+        ContactEvent.archived.is_(True),
+        ContactEvent.sortDate.in_(dates)
+    ).first() is None:
+        return set()
+    archived, _ = get_archived_events(db, contact.contactId, 0, contact.archivedEventCount)
+    return {_event_key(event) for event in archived}
+
+
+def _archive_cutoff(max_age_days=None, now=None):
+    if max_age_days is None:
+        max_age_days = EVENT_ARCHIVE_AGE_DAYS
+    return (now or datetime.utcnow()) - timedelta(days=max_age_days)
+
+
+def archive_old_events(db, contact, max_age_days=None, now=None):
+    """
+    Move the contact's events older than max_age_days to event_archive
+
+    Events without a parseable date stay on the contact. Old events already
+    in the contact's archive (same date, type and notes, e.g. a re-imported
+    YAML file or an include_archived listing sent back) are dropped instead
+    of being archived twice.
+
+    Returns:
+        int: Number of events archived
+    """
+    if not contact.events:
+        return 0
+
+    cutoff = _archive_cutoff(max_age_days, now)
+
+    events = json.loads(contact.events)
+    recent, old = [], []
+    for event in events:
+        date = parse_event_date(event.get("date"))
+        (old if date is not None and date < cutoff else recent).append(event)
+
+    if not old:
+        return 0
+
+    archived_keys = _archived_event_keys(db, contact, old)
+    if archived_keys:
+        old = [event for event in old if _event_key(event) not in archived_keys]
+    contact.events = json.dumps(recent, ensure_ascii=False)
+    if not old:
+        return 0
+
+    old.sort(key=_sort_key, reverse=True)
+    # Inserted right away: the contact_events rows point to the chunk's id
+    archive_id = db.execute(EventArchive.__table__.insert().values(
+        contactId=contact.contactId,
+        firstEventDate=old[-1].get("date"),
+        lastEventDate=old[0].get("date"),
+        eventCount=len(old),
+        payload=zlib.compress(json.dumps(old, ensure_ascii=False).encode('utf-8'))
+    )).inserted_primary_key[0]
+    _add_event_rows(db, contact.contactId, old, archive_id=archive_id)
+    contact.archivedEventCount = (contact.archivedEventCount or 0) + len(old)
+    return len(old)
+
+
+def contacts_with_old_events(db, max_age_days=None):
+    """
+    IDs of the contacts whose recent events include some older than max_age_days
+
+    Answered from the sortDate index of contact_events, so the sweep only
+    loads contacts that actually have something to archive.
+    """
+    cutoff = _archive_cutoff(max_age_days).strftime("%Y-%m-%dT%H:%M:%S")
+    # Deduplicated here: DISTINCT would make SQLite walk the contactId index instead
+    return list(dict.fromkeys(db.execute(
+        select(ContactEvent.contactId).where(
+            ContactEvent.sortDate < cutoff,
+            ContactEvent.archived.is_(False)
+        )
+    ).scalars()))
+
+
+def archive_contacts_events(db, contact_ids, max_age_days=None):
+    """
+    Archive old events of the given contacts (one batch of the periodic sweep)
+
+    Returns:
+        int: Number of events archived
+    """
+    archived = 0
+    for contact in db.query(Contact).filter(Contact.contactId.in_(contact_ids)):
+        count = archive_old_events(db, contact, max_age_days)
+        if inspect(contact).attrs.events.history.has_changes():
+            sync_contact_events(db, contact)
+            update_contact_summary(db, contact)
+        archived += count
+    return archived
+
+
+def update_contact_summary(db, contact):
+    """Recompute the summary columns used for sorting, range filters and matching"""
+    contact.phoneKey = normalize_phone(contact.phone)
+
+    events = json.loads(contact.events) if contact.events else []
+    actions = json.loads(contact.nextActions) if contact.nextActions else []
+    opportunities = json.loads(contact.opportunities) if contact.opportunities else []
+
+    contact.eventCount = len(events) + (contact.archivedEventCount or 0)
+
+    event_dates = [d for d in (normalize_event_date(e.get("date")) for e in events) if d]
+    if event_dates:
+        contact.lastEventAt = max(event_dates)
+    elif contact.archivedEventCount:
+        contact.lastEventAt = db.query(func.max(ContactEvent.sortDate)).filter(
+            ContactEvent.contactId == contact.contactId
+        ).scalar()
+    else:
+        contact.lastEventAt = None
+
+    due_dates = [d for d in (normalize_event_date(a.get("dueDate")) for a in actions) if d]
+    contact.nextDueDate = min(due_dates) if due_dates else None
+
+    total = 0.0
+    for opp in opportunities:
+        try:
+            total += float(opp.get("estimatedValue") or 0)
+        except (TypeError, ValueError):
+            pass
+    contact.opportunityCount = len(opportunities)
+    contact.opportunityValue = total
+
+
+def _next_contact_ids(db, after, limit, *criteria):
+    """Up to limit contactIds after `after`, in primary key order"""
+    return db.execute(
+        select(Contact.contactId).where(Contact.contactId > after, *criteria)
+        .order_by(Contact.contactId).limit(limit)
+    ).scalars().all()
+
+
+def backfill_contact_summaries(db, after="", limit=50):
+    """
+    Compute summary columns of contacts written before they existed (one batch)
+
+    Returns:
+        str: Last contactId processed, None once done
+    """
+    contact_ids = _next_contact_ids(db, after, limit, Contact.eventCount.is_(None))
+    for contact in db.query(Contact).filter(Contact.contactId.in_(contact_ids)):
+        update_contact_summary(db, contact)
+    return contact_ids[-1] if len(contact_ids) == limit else None
+
+
+def backfill_compressed_columns(db, after="", limit=50):
+    """
+    Compress the large events/importantNotes values written before compression existed (one batch)
+
+    Returns:
+        str: Last contactId processed, None once done
+    """
+    table = Contact.__table__
+    columns = (table.c.events, table.c.importantNotes)
+
+    def stored_large(column):
+        return and_(func.typeof(column) == "text",
+                    func.length(cast(column, LargeBinary)) >= COMPRESS_MIN_BYTES)
+
+    contact_ids = _next_contact_ids(db, after, limit, or_(*(stored_large(c) for c in columns)))
+    if contact_ids:
+        # Writing the values back through the column type compresses them
+        rewrite = update(table).where(table.c.contactId == bindparam("_id")).values(
+            {c.name: bindparam(c.name, type_=c.type) for c in columns})
+        rows = db.execute(select(table.c.contactId, *columns).where(table.c.contactId.in_(contact_ids)))
+        db.execute(rewrite, [
+            {"_id": row.contactId, "events": row.events, "importantNotes": row.importantNotes}
+            for row in rows
+        ])
+    return contact_ids[-1] if len(contact_ids) == limit else None
+
+
+def _add_event_rows(db, contact_id, events, archive_id=None):
+    rows = []
+    for position, event in enumerate(events):
+        sort_date = normalize_event_date(event.get("date"))
+        if sort_date is None:
+            continue
+        rows.append({
+            "contactId": contact_id,
+            "sortDate": sort_date,
+            "date": event.get("date"),
+            "type": event.get("type"),
+            "archived": archive_id is not None,
+            "archiveId": archive_id,
+            "position": position
+        })
+    if rows:
+        db.execute(ContactEvent.__table__.insert(), rows)
+
+
+def sync_contact_events(db, contact):
+    """Rebuild the contact_events rows of a contact's recent events"""
+    db.query(ContactEvent).filter(
+        ContactEvent.contactId == contact.contactId,
+        ContactEvent.archived.is_(False)
+    ).delete(synchronize_session=False)
+    events = json.loads(contact.events) if contact.events else []
+    _add_event_rows(db, contact.contactId, events)
+
+
+def reset_contact_events(db, after="", limit=2000):
+    """
+    Empty contact_events (one batch of rows) before reindex_contact_events() refills it
+
+    Rows written before notes were dropped from contact_events have no
+    position to find their notes with. Once the table is empty, the notes
+    column itself is dropped to give its space back (kept, empty, where
+    SQLite is too old for DROP COLUMN).
+
+    Returns:
+        str: after, unchanged while rows remain, None once done
+    """
+    deleted = db.execute(text(
+        "DELETE FROM contact_events WHERE id IN (SELECT id FROM contact_events ORDER BY id LIMIT :limit)"
+    ), {"limit": limit}).rowcount
+    if deleted == limit:
+        return after
+    columns = {row[1] for row in db.execute(text("PRAGMA table_info(contact_events)"))}
+    if "notes" in columns:
+        try:
+            with db.begin_nested():
+                db.execute(text("ALTER TABLE contact_events DROP COLUMN notes"))
+        except OperationalError:
+            pass
+    return None
+
+
+def reindex_contact_events(db, after="", limit=20):
+    """
+    Rebuild the contact_events rows of a batch of contacts from their events and archive
+
+    A contact's rows are replaced as a whole, so a batch can be run again
+    (e.g. after an interrupted upgrade) and API writes may go in between.
+
+    Returns:
+        str: Last contactId processed, None once done
+    """
+    contact_ids = _next_contact_ids(db, after, limit)
+    if not contact_ids:
+        return None
+    db.query(ContactEvent).filter(ContactEvent.contactId.in_(contact_ids)).delete(synchronize_session=False)
+    for contact_id, events in db.query(Contact.contactId, Contact.events).filter(
+        Contact.contactId.in_(contact_ids)
+    ):
+        _add_event_rows(db, contact_id, json.loads(events) if events else [])
+    for chunk in db.query(EventArchive).filter(EventArchive.contactId.in_(contact_ids)):
+        _add_event_rows(db, chunk.contactId, json.loads(zlib.decompress(chunk.payload)), archive_id=chunk.id)
+    return contact_ids[-1] if len(contact_ids) == limit else None
+
+
+def backfill_phone_keys(db, after="", limit=200):
+    """
+    Fill phoneKey for contacts written before it existed (one batch)
+
+    Returns:
+        str: Last contactId processed, None once done
+    """
+    contact_ids = _next_contact_ids(db, after, limit, Contact.phone.isnot(None), Contact.phoneKey.is_(None))
+    if contact_ids:
+        db.execute(update(Contact), [
+            {"contactId": contact_id, "phoneKey": normalize_phone(phone)}
+            for contact_id, phone in db.query(Contact.contactId, Contact.phone).filter(
+                Contact.contactId.in_(contact_ids))
+        ])
+    return contact_ids[-1] if len(contact_ids) == limit else None
+
+
+# Upgrades of the derived data of older databases, in order:
+# (PRAGMA user_version once applied, steps). Steps work by batches:
+# step(db, after) handles the next batch after the position `after` (a
+# contactId, "" to start) and returns the next position, or None once done.
+# Their default batch sizes keep each call around 20 ms on 10k contacts.
+# Version 2 also rebuilds contact_events and the summaries that version 1
+# used to fill.
+DATABASE_UPGRADES = (
+    (1, (backfill_compressed_columns,)),
+    (2, (reset_contact_events, reindex_contact_events, backfill_contact_summaries)),
+    (3, (backfill_phone_keys,)),
+)
+
+
+def pending_upgrades(db):
+    """(version, steps) of the upgrades a database has not had yet"""
+    version = db.execute(text("PRAGMA user_version")).scalar()
+    return [(target, steps) for target, steps in DATABASE_UPGRADES if version < target]
+
+
+def set_database_version(db, version):
+    """Record an upgrade as applied (PRAGMA user_version, part of the transaction)"""
+    db.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+
+def get_archived_events(db, contact_id, offset=0, limit=50):
+    """
+    Page through a contact's archived events, newest chunk first
+
+    Chunks before the requested page are skipped using their event count,
+    so only the chunks overlapping the page are decompressed.
+
+    Returns:
+        tuple: (list of events, total number of archived events)
+    """
+    chunks = db.query(EventArchive.id, EventArchive.eventCount).filter(
+        EventArchive.contactId == contact_id
+    ).order_by(EventArchive.lastEventDate.desc(), EventArchive.id.desc()).all()
+
+    total = sum(count for _, count in chunks)
+    events = []
+    position = 0
+    for chunk_id, count in chunks:
+        if len(events) >= limit:
+            break
+        if position + count <= offset:
+            position += count
+            continue
+        payload = db.query(EventArchive.payload).filter(EventArchive.id == chunk_id).scalar()
+        chunk = json.loads(zlib.decompress(payload))
+        start = max(offset - position, 0)
+        events.extend(chunk[start:start + limit - len(events)])
+        position += count
+
+    return events, total
+
+
+def get_all_events(db, contact):
+    """Return recent and archived events of a contact, newest first"""
+    events = json.loads(contact.events) if contact.events else []
+    if contact.archivedEventCount:
+        archived, _ = get_archived_events(db, contact.contactId, 0, contact.archivedEventCount)
+        events.extend(archived)
+    return sort_events(events)
+
+
+def get_event_notes(db, rows):
+    """
+    Notes of contact_events rows, read from their source lists
+
+    Recent events are found in contacts.events, archived ones in their
+    event_archive chunk; each source is decoded once for all the rows.
+
+    Args:
+        rows: Rows with contactId, archiveId and position attributes
+
+    Returns:
+        list: Notes of each row ("" when not found)
+    """
+    recent_ids = {row.contactId for row in rows if row.archiveId is None}
+    archive_ids = {row.archiveId for row in rows if row.archiveId is not None}
+    sources = {}
+    if recent_ids:
+        for contact_id, events in db.query(Contact.contactId, Contact.events).filter(
+            Contact.contactId.in_(recent_ids)
+        ):
+            sources[(contact_id, None)] = json.loads(events) if events else []
+    if archive_ids:
+        for archive_id, contact_id, payload in db.query(
+            EventArchive.id, EventArchive.contactId, EventArchive.payload
+        ).filter(EventArchive.id.in_(archive_ids)):
+            sources[(contact_id, archive_id)] = json.loads(zlib.decompress(payload))
+
+    notes = []
+    for row in rows:
+        events = sources.get((row.contactId, row.archiveId), [])
+        event = events[row.position] if row.position is not None and row.position < len(events) else {}
+        notes.append(event.get("notes") or "")
+    return notes
+
+
+def sync_contact(db, contact):
+    """Update data derived from a contact after its columns were written"""
+    state = inspect(contact)
+    events_changed = state.transient or state.pending or \
+        state.attrs.events.history.has_changes()
+    if events_changed:
+        archive_old_events(db, contact)
+        if state.transient or state.pending:
+            # New contact: it has no rows to replace yet
+            events = json.loads(contact.events) if contact.events else []
+            _add_event_rows(db, contact.contactId, events)
+        else:
+            sync_contact_events(db, contact)
+
+    update_contact_summary(db, contact)
+
+
+def purge_contact(db, contact):
+    """Delete data attached to a contact before deleting the contact itself"""
+    db.query(EventArchive).filter(EventArchive.contactId == contact.contactId).delete()
+    db.query(ContactEvent).filter(ContactEvent.contactId == contact.contactId).delete()
@@ -1,25 +1,137 @@
 """
 SQLite database management module for contact records
 """
-from sqlalchemy import create_engine, Column, String, Text, DateTime
+from sqlalchemy import create_engine, event, func, inspect, text, Column, Index, Integer, Boolean, Float, String, Text, DateTime, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.types import TypeDecorator
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextvars import ContextVar
+from datetime import datetime, timezone
 import json
+import os
+import re
+import threading
+import time
+import zlib
+
+from compression import compress_text, decompress_text
 
 # SQLite database configuration
-DATABASE_URL = "sqlite:///./data/contacts.db"
+DATABASE_URL = os.getenv("CRM_DATABASE_URL", "sqlite:///./data/contacts.db")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Multi-tenant mode: every other tenant gets its own SQLite file in this directory
+TENANT_DATABASE_DIR = os.getenv("CRM_TENANT_DATABASE_DIR", "./data/tenants")
+# Tenant engines kept open at most; the least recently used one is disposed beyond that
+MAX_TENANT_ENGINES = int(os.getenv("CRM_MAX_TENANT_ENGINES", "32"))
+# Tenant engines unused for this long (s) are disposed by TenantEngines.evict_idle()
+TENANT_IDLE_SECONDS = float(os.getenv("CRM_TENANT_IDLE_SECONDS", "600"))
+# Pooled connections kept per tenant engine (each holds the db, -wal and -shm files open)
+TENANT_POOL_SIZE = 2
+
+DEFAULT_TENANT = "default"
+TENANT_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+# Tenant of the current request / CLI invocation
+current_tenant = ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+
+def parse_event_date(value):
+    """
+    Parse an event date ("2025-12-10", "2025-12-10T14:30:00Z", ...)
+
+    Returns:
+        datetime: Naive UTC datetime, or None if the value is not a date
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def normalize_event_date(value):
+    """Return the sortable "YYYY-MM-DDTHH:MM:SS" form of a date, or None"""
+    date = parse_event_date(value)
+    return date.strftime("%Y-%m-%dT%H:%M:%S") if date else None
+
+
+PHONE_SEPARATORS_RE = re.compile(r"[\s.\-()/]")
+
+
+def normalize_phone(value):
+    """Return the comparable form of a phone number ("+33612345678"), or None"""
+    if not value or not isinstance(value, str):
+        return None
+    value = PHONE_SEPARATORS_RE.sub("", value.replace("(0)", ""))
+    if value.startswith("00"):
+        value = "+" + value[2:]
+    return value or None
+
+
+def _archive_json(payload):
+    return zlib.decompress(payload).decode("utf-8") if payload is not None else None
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """Enable WAL, incremental vacuum and a busy timeout, and let SQLAlchemy drive transactions"""
+    # Disable pysqlite's implicit BEGIN so SAVEPOINTs behave (see "begin" below)
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    # Only applies to new databases (older ones: `python maintenance.py vacuum --full`).
+    # Not set on existing files: it would invalidate the snapshot of the
+    # transactions open on other connections, whose next write fails at once
+    # with "database is locked"
+    if cursor.execute("PRAGMA page_count").fetchone()[0] == 0:
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+    # JSON text of a CompressedJSON column / of an event_archive payload, for json_each() & co in SQL
+    dbapi_connection.create_function("json_text", 1, decompress_text, deterministic=True)
+    dbapi_connection.create_function("archive_json", 1, _archive_json, deterministic=True)
+    # Same normalization as the summary and contact_events date columns, for JSON dates
+    dbapi_connection.create_function("normalize_date", 1, normalize_event_date, deterministic=True)
+
+
+def _begin_transaction(conn):
+    """Emit BEGIN ourselves since pysqlite no longer does it"""
+    conn.exec_driver_sql("BEGIN")
+
+
+def create_sqlite_engine(url, **kwargs):
+    """Create an engine configured for this application (WAL, SAVEPOINT support)"""
+    new_engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+    event.listen(new_engine, "connect", _configure_sqlite)
+    event.listen(new_engine, "begin", _begin_transaction)
+    return new_engine
+
+
+engine = create_sqlite_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+class CompressedJSON(TypeDecorator):
+    """JSON text column stored zlib-compressed above a size threshold (see compression.py)"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
 class Contact(Base):
     """Contact table model with JSON columns for structured data"""
     __tablename__ = "contacts"
@@ -27,41 +139,344 @@ class Contact(Base):
     contactId = Column(String, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     email = Column(String, index=True)
-    phone = Column(String, index=True)
+    phone = Column(String, index=True)  # As entered
+    phoneKey = Column(String, index=True)  # normalize_phone(phone), for matching
     company = Column(String, index=True)
     position = Column(String)
-    events = Column(Text)  # Stored as JSON
-    importantNotes = Column(Text)  # Stored as JSON
+    events = Column(CompressedJSON)  # Stored as JSON
+    importantNotes = Column(CompressedJSON)  # Stored as JSON
     nextActions = Column(Text)  # Stored as JSON
     opportunities = Column(Text)  # Stored as JSON
+    archivedEventCount = Column(Integer, default=0)  # Events moved to event_archive
     createdAt = Column(DateTime, default=datetime.utcnow)
 
-    def to_dict(self):
-        """Convert Contact object to JSON dictionary"""
-        return {
-            "contactId": self.contactId,
-            "name": self.name,
-            "email": self.email,
-            "phone": self.phone,
-            "company": self.company,
-            "position": self.position,
-            "events": json.loads(self.events) if self.events else [],
-            "importantNotes": json.loads(self.importantNotes) if self.importantNotes else [],
-            "nextActions": json.loads(self.nextActions) if self.nextActions else [],
-            "opportunities": json.loads(self.opportunities) if self.opportunities else [],
-            "createdAt": self.createdAt.isoformat() if self.createdAt else None
-        }
+    # Summary columns maintained by contact_store.update_contact_summary()
+    eventCount = Column(Integer, index=True)  # Recent + archived events
+    lastEventAt = Column(String, index=True)  # Normalized UTC date
+    nextDueDate = Column(String, index=True)  # Earliest nextActions dueDate
+    opportunityCount = Column(Integer)
+    opportunityValue = Column(Float, index=True)  # Sum of estimatedValue
+
+    # Serves the default listing order (newest first) and its pagination
+    __table_args__ = (
+        Index("ix_contacts_createdAt_contactId", "createdAt", "contactId"),
+    )
+
+    def to_dict(self, fields=None):
+        """Convert Contact object to JSON dictionary (optionally only some fields)"""
+        result = {}
+        for field in fields or CONTACT_FIELDS:
+            value = getattr(self, field)
+            if field in JSON_FIELDS:
+                result[field] = json.loads(value) if value else []
+            elif field == "archivedEventCount":
+                result[field] = value or 0
+            elif field == "createdAt":
+                result[field] = value.isoformat() if value else None
+            else:
+                result[field] = value
+        return result
+
+
+# Case-insensitive exact name lookups (import/export scripts):
+# lower(name) = lower(?) can use this index, ilike cannot
+Index("ix_contacts_name_lower", func.lower(Contact.name))
+# Same for email matching in the bulk importer
+Index("ix_contacts_email_lower", func.lower(Contact.email))
+
+
+# Fields of Contact.to_dict(), in output order
+CONTACT_FIELDS = (
+    "contactId", "name", "email", "phone", "company", "position",
+    "events", "importantNotes", "nextActions", "opportunities",
+    "archivedEventCount", "createdAt",
+    "eventCount", "lastEventAt", "nextDueDate", "opportunityValue"
+)
+JSON_FIELDS = ("events", "importantNotes", "nextActions", "opportunities")
+
+
+class EventArchive(Base):
+    """Chunk of old events moved out of a contact (zlib-compressed JSON)"""
+    __tablename__ = "event_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    contactId = Column(String, nullable=False)
+    firstEventDate = Column(String)
+    lastEventDate = Column(String)
+    eventCount = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # zlib(JSON list), newest first
+    archivedAt = Column(DateTime, default=datetime.utcnow)
+
+    # Paging a contact's chunks newest first (ties broken by the rowid)
+    __table_args__ = (
+        Index("ix_event_archive_contactId_lastEventDate", "contactId", "lastEventDate"),
+    )
+
+
+class ContactEvent(Base):
+    """
+    One row per event (recent or archived), for cross-contact timelines
+
+    Notes are not copied here: position locates the event in its source list,
+    contacts.events for recent events or the archiveId chunk for archived ones.
+    """
+    __tablename__ = "contact_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    contactId = Column(String, nullable=False, index=True)
+    sortDate = Column(String, nullable=False)  # Normalized UTC "YYYY-MM-DDTHH:MM:SS"
+    date = Column(String)  # Date as entered
+    type = Column(String)
+    archived = Column(Boolean, nullable=False, default=False)
+    archiveId = Column(Integer)  # event_archive.id of archived events
+    position = Column(Integer)  # Index of the event in its source list
+
+    # SQLite appends the rowid (id) to every index, so these also serve the
+    # (sortDate, id) keyset ordering
+    __table_args__ = (
+        Index("ix_contact_events_sortDate", "sortDate"),
+        Index("ix_contact_events_type_sortDate", "type", "sortDate"),
+    )
+
+
+def validate_tenant(tenant):
+    """
+    Check a tenant identifier (lowercase letters, digits, '-' and '_')
+
+    Raises:
+        ValueError: If the identifier is invalid
+    """
+    if not tenant or not TENANT_ID_RE.match(tenant):
+        raise ValueError(f"Invalid tenant '{tenant}': expected lowercase letters, digits, '-' or '_'")
+    return tenant
+
+
+def set_current_tenant(tenant):
+    """Route the following sessions of this context to a tenant; returns the ContextVar token"""
+    return current_tenant.set(validate_tenant(tenant or DEFAULT_TENANT))
+
+
+def use_tenant(tenant, must_exist=True):
+    """
+    Select the tenant of a CLI invocation (None: default database)
+
+    Raises:
+        ValueError: If the tenant identifier is invalid, or if must_exist
+                    and the tenant has no database yet
+    """
+    set_current_tenant(tenant)
+    if must_exist and tenant not in (None, DEFAULT_TENANT) \
+            and not os.path.exists(tenant_database_path(tenant)):
+        raise ValueError(f"Unknown tenant '{tenant}' (create it with: python init_db.py --tenant {tenant})")
+
+
+def tenant_database_path(tenant):
+    """Path of a (non-default) tenant's SQLite file"""
+    return os.path.join(TENANT_DATABASE_DIR, f"{validate_tenant(tenant)}.db")
+
+
+class TenantEngines:
+    """
+    LRU cache of per-tenant engines
+
+    Only existing tenant databases are opened, unless get() is asked to
+    create one (init_db.py --tenant). Beyond max_engines open tenants, and
+    for tenants idle longer than idle_seconds (evict_idle()), the engine is
+    disposed, closing its pooled connections and files.
+    """
+
+    def __init__(self, max_engines=MAX_TENANT_ENGINES, idle_seconds=TENANT_IDLE_SECONDS):
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()  # tenant -> [engine, session factory, last use]
+        self._opening = {}  # tenant -> Future of (engine, session factory), while being opened
+        self._lock = threading.Lock()
+        # Optional callbacks taking the tenant, called outside the lock
+        self.on_open = None
+        self.on_evict = None
+
+    def get(self, tenant, create=False):
+        """
+        Return (engine, session factory) of a tenant, opening it if needed
+
+        The database is opened and migrated (init_db) outside the lock, so
+        other tenants' lookups are not held up; concurrent requests for the
+        same tenant wait for that one opening.
+
+        Raises:
+            ValueError: If the tenant has no database and create is False
+        """
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None:
+                self._entries.move_to_end(tenant)
+                entry[2] = time.monotonic()
+                return entry[0], entry[1]
+
+            opening = self._opening.get(tenant)
+            waiting = opening is not None
+            if not waiting:
+                if not create and not os.path.exists(tenant_database_path(tenant)):
+                    raise ValueError(f"Unknown tenant '{tenant}'")
+                opening = self._opening[tenant] = Future()
+
+        if waiting:
+            # Another thread is opening it
+            return opening.result()
+
+        try:
+            os.makedirs(TENANT_DATABASE_DIR, exist_ok=True)
+            tenant_engine = create_sqlite_engine(
+                f"sqlite:///{tenant_database_path(tenant)}", pool_size=TENANT_POOL_SIZE)
+            try:
+                init_db(tenant_engine)
+            except Exception:
+                tenant_engine.dispose()
+                raise
+        except Exception as e:
+            with self._lock:
+                del self._opening[tenant]
+            opening.set_exception(e)
+            raise
+
+        entry = [tenant_engine, sessionmaker(autocommit=False, autoflush=False, bind=tenant_engine),
+                 time.monotonic()]
+        with self._lock:
+            del self._opening[tenant]
+            self._entries[tenant] = entry
+            evicted = []
+            while len(self._entries) > self.max_engines:
+                evicted.append(self._entries.popitem(last=False))
+        opening.set_result((entry[0], entry[1]))
+
+        self._dispose(evicted)
+        if self.on_open is not None:
+            self.on_open(tenant)
+        return entry[0], entry[1]
+
+    def evict_idle(self):
+        """
+        Dispose the engines of tenants idle for longer than idle_seconds
+
+        Returns:
+            int: Number of engines disposed
+        """
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            evicted = [(tenant, entry) for tenant, entry in self._entries.items() if entry[2] < cutoff]
+            for tenant, _ in evicted:
+                del self._entries[tenant]
+        self._dispose(evicted)
+        return len(evicted)
+
+    def is_open(self, tenant):
+        """Whether the tenant's engine is open (does not count as a use)"""
+        with self._lock:
+            return tenant in self._entries
+
+    def open_engines(self):
+        """(tenant, engine) of the open tenants, least recently used first (does not count as a use)"""
+        with self._lock:
+            return [(tenant, entry[0]) for tenant, entry in self._entries.items()]
+
+    def _dispose(self, evicted):
+        # Connections still checked out keep working and are closed when returned
+        for tenant, entry in evicted:
+            entry[0].dispose()
+            if self.on_evict is not None:
+                self.on_evict(tenant)
+
+
+tenant_engines = TenantEngines()
+
+
+def get_engine(tenant=None, create=False):
+    """Engine of a tenant (default: the current tenant), creating its database if create"""
+    tenant = tenant or current_tenant.get()
+    if tenant == DEFAULT_TENANT:
+        return engine
+    return tenant_engines.get(tenant, create)[0]
+
+
+def tenant_exists(tenant):
+    """Whether a tenant has a database (the default one always does)"""
+    return tenant == DEFAULT_TENANT or tenant_engines.is_open(tenant) \
+        or os.path.exists(tenant_database_path(tenant))
+
+
+def get_session(tenant=None):
+    """New session on a tenant's database (default: the current tenant)"""
+    tenant = tenant or current_tenant.get()
+    if tenant == DEFAULT_TENANT:
+        return SessionLocal()
+    return tenant_engines.get(tenant)[1]()
+
+
+def open_engines():
+    """(tenant, engine) of the default database and of the open tenant databases"""
+    return [(DEFAULT_TENANT, engine)] + tenant_engines.open_engines()
+
+
+def database_files():
+    """(tenant, path) of every SQLite file: the default database and all tenant files"""
+    files = []
+    if engine.url.database and engine.url.database != ":memory:":
+        files.append((DEFAULT_TENANT, engine.url.database))
+    if os.path.isdir(TENANT_DATABASE_DIR):
+        for name in sorted(os.listdir(TENANT_DATABASE_DIR)):
+            tenant, ext = os.path.splitext(name)
+            if ext == ".db" and TENANT_ID_RE.match(tenant):
+                files.append((tenant, os.path.join(TENANT_DATABASE_DIR, name)))
+    return files
 
 
 def get_db():
-    """Database session generator for FastAPI"""
-    db = SessionLocal()
+    """Database session generator for FastAPI (database of the request's tenant)"""
+    db = get_session()
     try:
         yield db
     finally:
         db.close()
 
 
-def init_db():
-    """Initialize the database (create tables)"""
-    Base.metadata.create_all(bind=engine)
+def explain_query_plan(db, statement):
+    """
+    Run EXPLAIN QUERY PLAN for a SQLAlchemy statement
+
+    Returns:
+        list: Plan details, e.g. "SEARCH contacts USING INDEX ix_contacts_company (company=?)"
+    """
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or ())
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return [row[3] for row in rows]
+
+
+def init_db(db_engine=None):
+    """Initialize a database (create tables, add missing columns); default: the current tenant's"""
+    db_engine = db_engine or get_engine(create=True)
+    Base.metadata.create_all(bind=db_engine)
+    migrate_columns(db_engine)
+
+
+def migrate_columns(db_engine):
+    """Add columns (and their indexes) declared on the models but missing from existing tables"""
+    with db_engine.begin() as conn:
+        # Inspect on this connection: a new one would run the connect PRAGMAs
+        # mid-transaction and invalidate its snapshot ("database is locked")
+        inspector = inspect(conn)
+        # Read index names directly: reflection skips expression indexes
+        existing_indexes = {row[0] for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )}
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=db_engine.dialect)
+                    conn.execute(text(
+                        f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'
+                    ))
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
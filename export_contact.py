@@ -8,13 +8,84 @@ Usage:
     python export_contact.py "Jean Dupont" -o exports/jean.yaml
     python export_contact.py --all
     python export_contact.py --all --output exports/
+    python export_contact.py --all --incremental --output exports/
+    python export_contact.py --all --tenant acme
 """
 
 import argparse
+import hashlib
+import json
+import os
 import sys
 import yaml
 from pathlib import Path
-from database import SessionLocal, Contact
+from sqlalchemy import func
+from contact_store import get_all_events
+from database import get_session, use_tenant, Contact, CONTACT_FIELDS
+
+# Manifest of an incremental export: contactId -> {file, hash}
+MANIFEST_NAME = ".export_manifest.json"
+# Bump when the YAML layout changes so the next incremental export rewrites everything
+MANIFEST_FORMAT = 3
+
+# Exported fields: to_dict() without the storage details and the summary
+# columns derived from the lists, which change when events are archived
+EXPORT_FIELDS = tuple(field for field in CONTACT_FIELDS if field not in (
+    "archivedEventCount", "eventCount", "lastEventAt", "nextDueDate", "opportunityValue"
+))
+
+
+def contact_filename(name):
+    """Nom du fichier YAML d'un contact (dérivé de son nom)"""
+    return name.lower().replace(' ', '_').replace('/', '_') + ".yaml"
+
+
+def unique_contact_filename(contact, used):
+    """
+    Nom du fichier YAML d'un contact dans un export de tous les contacts
+
+    Le premier contact d'un nom garde contact_filename() ; les suivants
+    (homonymes, ou noms qui ne diffèrent que par la casse) sont suffixés de
+    leur contactId au lieu de partager le même fichier.
+
+    Args:
+        used (set): Noms de fichiers déjà attribués, complété par l'appel
+    """
+    filename = contact_filename(contact.name)
+    if filename in used:
+        filename = contact_filename(f"{contact.name} {contact.contactId}")
+    used.add(filename)
+    return filename
+
+
+def contact_export_dict(db, contact):
+    """
+    Dictionnaire exporté d'un contact
+
+    Les événements (récents et archivés) sont toujours triés du plus récent au
+    plus ancien : archiver des événements ne change pas le fichier exporté.
+    """
+    contact_dict = contact.to_dict(EXPORT_FIELDS)
+    contact_dict["events"] = get_all_events(db, contact)
+    return contact_dict
+
+
+def dump_contact_yaml(contact_dict, f):
+    """Écrit un contact (dictionnaire to_dict()) au format YAML"""
+    yaml.dump(
+        contact_dict,
+        f,
+        allow_unicode=True,
+        default_flow_style=False,
+        sort_keys=False,
+        indent=2
+    )
+
+
+def contact_hash(contact_dict):
+    """Empreinte du contenu exporté d'un contact"""
+    content = json.dumps(contact_dict, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
 def export_contact_to_yaml(nom_contact, output_file=None):
@@ -28,13 +99,18 @@ def export_contact_to_yaml(nom_contact, output_file=None):
     Returns:
         bool: True si succès, False sinon
     """
-    db = SessionLocal()
+    db = get_session()
     
     try:
-        # Search for contact by name (case-insensitive)
+        # Search for contact by exact name first (indexed), then by
+        # partial name (case-insensitive)
         contact = db.query(Contact).filter(
-            Contact.name.ilike(f"%{nom_contact}%")
+            func.lower(Contact.name) == func.lower(nom_contact)
         ).first()
+        if not contact:
+            contact = db.query(Contact).filter(
+                Contact.name.ilike(f"%{nom_contact}%")
+            ).first()
         
         if not contact:
             print(f"❌ Aucun contact trouvé avec le nom: {nom_contact}", file=sys.stderr)
@@ -42,13 +118,12 @@ def export_contact_to_yaml(nom_contact, output_file=None):
             return False
         
         # Convertir le contact en dictionnaire
-        contact_dict = contact.to_dict()
+        contact_dict = contact_export_dict(db, contact)
         
         # Déterminer le nom du fichier de sortie
         if output_file is None:
             # Create filename based on contact name
-            safe_name = contact.name.lower().replace(' ', '_').replace('/', '_')
-            output_file = f"data/contacts/{safe_name}.yaml"
+            output_file = f"data/contacts/{contact_filename(contact.name)}"
         
         # Créer le répertoire parent si nécessaire
         output_path = Path(output_file)
@@ -56,14 +131,7 @@ def export_contact_to_yaml(nom_contact, output_file=None):
         
         # Exporter vers YAML avec une belle mise en forme
         with open(output_file, 'w', encoding='utf-8') as f:
-            yaml.dump(
-                contact_dict,
-                f,
-                allow_unicode=True,
-                default_flow_style=False,
-                sort_keys=False,
-                indent=2
-            )
+            dump_contact_yaml(contact_dict, f)
         
         print(f"✅ Contact exported successfully!")
         print(f"📇 Name       : {contact.name}")
@@ -109,7 +177,7 @@ def export_all_contacts(output_dir=None):
     Returns:
         tuple: (nombre de succès, nombre d'échecs)
     """
-    db = SessionLocal()
+    db = get_session()
     
     # Définir le répertoire de sortie par défaut
     if output_dir is None:
@@ -138,25 +206,18 @@ def export_all_contacts(output_dir=None):
         output_path.mkdir(parents=True, exist_ok=True)
         
         # Exporter chaque contact
+        used_filenames = set()
         for i, contact in enumerate(contacts, 1):
             try:
-                # Créer un nom de fichier sûr
-                safe_name = contact.name.lower().replace(' ', '_').replace('/', '_')
-                output_file = f"{output_dir}{safe_name}.yaml"
+                # Créer un nom de fichier sûr, propre à chaque contact
+                output_file = f"{output_dir}{unique_contact_filename(contact, used_filenames)}"
                 
                 # Convertir le contact en dictionnaire
-                contact_dict = contact.to_dict()
+                contact_dict = contact_export_dict(db, contact)
                 
                 # Exporter vers YAML
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    yaml.dump(
-                        contact_dict,
-                        f,
-                        allow_unicode=True,
-                        default_flow_style=False,
-                        sort_keys=False,
-                        indent=2
-                    )
+                    dump_contact_yaml(contact_dict, f)
                 
                 company = f" ({contact.company})" if contact.company else ""
                 print(f"  [{i}/{len(contacts)}] ✅ {contact.name}{company} → {output_file}")
@@ -184,9 +245,128 @@ def export_all_contacts(output_dir=None):
         db.close()
 
 
+def load_manifest(output_dir):
+    """Charge le manifeste d'un export incrémental ({} s'il est absent ou d'un autre format)"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {}
+    return manifest.get("contacts", {})
+
+
+def save_manifest(output_dir, entries):
+    """Écrit le manifeste de façon atomique (fichier temporaire puis renommage)"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"format": MANIFEST_FORMAT, "contacts": entries}, f,
+                  ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def export_changed_contacts(output_dir=None):
+    """
+    Export incrémental : n'écrit que les contacts modifiés depuis le dernier export
+
+    Le manifeste (.export_manifest.json dans le répertoire de sortie) associe
+    chaque contactId à son fichier et à l'empreinte de son contenu. Seuls les
+    contacts nouveaux, modifiés ou renommés sont réécrits ; les fichiers des
+    contacts supprimés (ou l'ancien fichier d'un contact renommé) sont effacés.
+    Chaque contact a son propre fichier : les homonymes sont suffixés de leur
+    contactId.
+
+    Args:
+        output_dir (str): Répertoire de sortie (par défaut: data/contacts/)
+
+    Returns:
+        dict: Compteurs written, renamed, deleted, unchanged, errors
+    """
+    db = get_session()
+
+    if output_dir is None:
+        output_dir = "data/contacts/"
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    previous = load_manifest(output_path)
+    entries = {}
+    counts = {"written": 0, "renamed": 0, "deleted": 0, "unchanged": 0, "errors": 0}
+
+    print(f"\n🚀 Export incrémental vers {output_path}/")
+    print("─" * 60)
+
+    used_filenames = set()
+    try:
+        # Homonymes dans l'ordre de l'index sur name (ordre d'insertion) :
+        # le plus ancien garde le nom de fichier sans suffixe
+        for contact in db.query(Contact).order_by(Contact.name).yield_per(500):
+            contact_dict = contact_export_dict(db, contact)
+            filename = unique_contact_filename(contact, used_filenames)
+            digest = contact_hash(contact_dict)
+            old = previous.get(contact.contactId)
+
+            if old and old["file"] == filename and old["hash"] == digest \
+                    and (output_path / filename).exists():
+                entries[contact.contactId] = old
+                counts["unchanged"] += 1
+                continue
+
+            try:
+                # Fichier temporaire puis renommage : pas de fichier tronqué si l'export est interrompu
+                tmp_file = output_path / (filename + ".tmp")
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    dump_contact_yaml(contact_dict, f)
+                os.replace(tmp_file, output_path / filename)
+            except Exception as e:
+                print(f"  ❌ {contact.name} - Erreur: {e}")
+                counts["errors"] += 1
+                if old:
+                    entries[contact.contactId] = old
+                continue
+
+            entries[contact.contactId] = {"file": filename, "hash": digest}
+            if old and old["file"] != filename:
+                print(f"  ✏️  {old['file']} → {filename}")
+                counts["renamed"] += 1
+            else:
+                print(f"  ✅ {contact.name} → {filename}")
+                counts["written"] += 1
+    finally:
+        db.close()
+
+    # Fichiers qui ne correspondent plus à aucun contact (supprimé ou renommé)
+    current_files = {entry["file"] for entry in entries.values()}
+    for contact_id, old in previous.items():
+        if contact_id not in entries:
+            print(f"  🗑️  {old['file']}")
+            counts["deleted"] += 1
+        if old["file"] in current_files:
+            # Fichier repris par un autre contact (homonyme), déjà réécrit
+            continue
+        current_files.add(old["file"])
+        try:
+            (output_path / old["file"]).unlink()
+        except FileNotFoundError:
+            pass
+
+    save_manifest(output_path, entries)
+
+    print("─" * 60)
+    print(f"\n📊 Résumé:")
+    print(f"  ✅ Écrits    : {counts['written']}")
+    print(f"  ✏️  Renommés  : {counts['renamed']}")
+    print(f"  🗑️  Supprimés : {counts['deleted']}")
+    print(f"  💤 Inchangés : {counts['unchanged']}")
+    print(f"  ❌ Échecs    : {counts['errors']}")
+
+    return counts
+
+
 def list_contacts():
     """List all available contacts in the database"""
-    db = SessionLocal()
+    db = get_session()
     
     try:
         contacts = db.query(Contact).order_by(Contact.name).all()
@@ -221,6 +401,8 @@ Exemples d'utilisation:
   python export_contact.py --list
   python export_contact.py --all
   python export_contact.py --all --output exports/
+  python export_contact.py --all --incremental --output exports/
+  python export_contact.py --all --tenant acme
         """
     )
     
@@ -247,14 +429,35 @@ Exemples d'utilisation:
         help='Exporte tous les contacts (répertoire par défaut: data/contacts/)'
     )
     
+    parser.add_argument(
+        '-i', '--incremental',
+        action='store_true',
+        help="Avec --all : n'écrit que les contacts modifiés depuis le dernier export (manifeste .export_manifest.json)"
+    )
+    
+    parser.add_argument(
+        '-t', '--tenant',
+        help='Tenant dont la base est exportée (par défaut: base principale)'
+    )
+    
     args = parser.parse_args()
     
+    try:
+        use_tenant(args.tenant)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    
     # Si --list est spécifié, lister les contacts
     if args.list:
         list_contacts()
         return 0
     
     # Si --all est spécifié, exporter tous les contacts
+    if args.all and args.incremental:
+        counts = export_changed_contacts(args.output)
+        return 0 if counts["errors"] == 0 else 1
+    
     if args.all:
         success, errors = export_all_contacts(args.output)
         return 0 if errors == 0 else 1
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Structured filter expressions for GET /api/contacts?filter=
+
+Example:
+    company = "ACME" and opportunities.estimatedValue > 10000
+        and nextActions.dueDate < 2026-12-01
+
+Grammar:
+    expr       := and_expr ("or" and_expr)*
+    and_expr   := not_expr ("and" not_expr)*
+    not_expr   := "not" not_expr | "(" expr ")" | comparison
+    comparison := FIELD OP VALUE
+    OP         := = != < <= > >= ~        (~ is "contains", case-insensitive)
+    VALUE      := "string" | number | date | word | null
+
+Expressions compile to SQLAlchemy clauses. Comparisons on contact columns
+(including the summary columns) stay plain column comparisons so their
+indexes are used; events.date and events.type go through the indexed
+contact_events table (so archived events match too), events.notes reads the
+recent events and the archive chunks; the other JSON fields use EXISTS over
+json_each().
+
+Usage (prints the SQL and its query plan):
+    python filter_query.py 'company = "ACME" and events.type = call'
+"""
+import re
+import sys
+
+from sqlalchemy import and_, exists, func, literal, not_, or_, select, true
+
+from database import CompressedJSON, Contact, ContactEvent, EventArchive, normalize_event_date
+
+
+class FilterSyntaxError(ValueError):
+    """Raised for filter expressions that cannot be parsed or compiled"""
+
+
+# Plain columns: field -> (column, value kind)
+COLUMN_FIELDS = {
+    "name": (Contact.name, "text"),
+    "email": (Contact.email, "text"),
+    "phone": (Contact.phone, "text"),
+    "company": (Contact.company, "text"),
+    "position": (Contact.position, "text"),
+    "eventCount": (Contact.eventCount, "number"),
+    "lastEventAt": (Contact.lastEventAt, "date"),
+    "nextDueDate": (Contact.nextDueDate, "date"),
+    "opportunityValue": (Contact.opportunityValue, "number"),
+}
+
+# Event fields, answered from the contact_events table
+EVENT_FIELDS = {
+    "events.date": (ContactEvent.sortDate, "date"),
+    "events.type": (ContactEvent.type, "text"),
+}
+
+# Event fields not copied to contact_events: field -> (JSON path, kind),
+# read from the recent events and from the archive chunks
+EVENT_JSON_FIELDS = {
+    "events.notes": ("$.notes", "text"),
+}
+
+# Fields inside the other JSON columns: field -> (column, JSON path, kind)
+JSON_FIELDS = {
+    "importantNotes": (Contact.importantNotes, None, "text"),
+    "nextActions.action": (Contact.nextActions, "$.action", "text"),
+    "nextActions.dueDate": (Contact.nextActions, "$.dueDate", "date"),
+    "opportunities.project": (Contact.opportunities, "$.project", "text"),
+    "opportunities.estimatedValue": (Contact.opportunities, "$.estimatedValue", "number"),
+}
+
+FIELDS = sorted(list(COLUMN_FIELDS) + list(EVENT_FIELDS) + list(EVENT_JSON_FIELDS) + list(JSON_FIELDS))
+
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "~")
+
+TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<op>!=|<=|>=|=|<|>|~)
+      | (?P<paren>[()])
+      | (?P<word>[^\s()"=!<>~]+)
+    )''', re.VERBOSE)
+
+
+def tokenize(expression):
+    """Split an expression into (kind, value) tokens"""
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_RE.match(expression, position)
+        if not match:
+            raise FilterSyntaxError(f"Unexpected character at position {position}: {expression[position:]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        elif kind == "word" and value.lower() in ("and", "or", "not", "null"):
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            expected = value or kind or "token"
+            found = token[1] if token[0] else "end of expression"
+            raise FilterSyntaxError(f"Expected {expected}, found {found!r}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise FilterSyntaxError("Empty filter expression")
+        clause = self.parse_or()
+        if self.peek()[0] is not None:
+            raise FilterSyntaxError(f"Unexpected {self.peek()[1]!r}")
+        return clause
+
+    def parse_or(self):
+        clauses = [self.parse_and()]
+        while self.peek() == ("keyword", "or"):
+            self.take()
+            clauses.append(self.parse_and())
+        return clauses[0] if len(clauses) == 1 else or_(*clauses)
+
+    def parse_and(self):
+        clauses = [self.parse_not()]
+        while self.peek() == ("keyword", "and"):
+            self.take()
+            clauses.append(self.parse_not())
+        return clauses[0] if len(clauses) == 1 else and_(*clauses)
+
+    def parse_not(self):
+        if self.peek() == ("keyword", "not"):
+            self.take()
+            return not_(self.parse_not())
+        if self.peek() == ("paren", "("):
+            self.take()
+            clause = self.parse_or()
+            self.take("paren", ")")
+            return clause
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        _, field = self.take("word")
+        _, op = self.take("op")
+        kind, value = self.peek()
+        if kind not in ("string", "word") and (kind, value) != ("keyword", "null"):
+            raise FilterSyntaxError(f"Expected a value after {field} {op}")
+        self.take()
+        if kind == "keyword":
+            value = None
+        return compile_comparison(field, op, value)
+
+
+def _coerce(field, kind, op, value):
+    if op == "~" and kind != "text":
+        raise FilterSyntaxError(f"Operator ~ only applies to text fields, not {field}")
+    if value is None:
+        return None
+    if kind == "number":
+        try:
+            return float(value)
+        except ValueError:
+            raise FilterSyntaxError(f"{field} expects a number, got {value!r}")
+    if kind == "date":
+        normalized = normalize_event_date(value)
+        if normalized is None:
+            raise FilterSyntaxError(f"{field} expects a date, got {value!r}")
+        return normalized
+    return value
+
+
+def _compare(expression, op, value):
+    if value is None:
+        if op == "=":
+            return expression.is_(None)
+        if op == "!=":
+            return expression.isnot(None)
+        raise FilterSyntaxError(f"Operator {op} cannot be used with null")
+    if op == "~":
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return expression.like(f"%{escaped}%", escape="\\")
+    return {
+        "=": expression.__eq__,
+        "!=": expression.__ne__,
+        "<": expression.__lt__,
+        "<=": expression.__le__,
+        ">": expression.__gt__,
+        ">=": expression.__ge__,
+    }[op](value)
+
+
+def compile_comparison(field, op, value):
+    """Compile one `field op value` comparison to a SQLAlchemy clause"""
+    if op not in OPERATORS:
+        raise FilterSyntaxError(f"Unknown operator {op}")
+
+    if field in COLUMN_FIELDS:
+        column, kind = COLUMN_FIELDS[field]
+        return _compare(column, op, _coerce(field, kind, op, value))
+
+    if field in EVENT_FIELDS:
+        column, kind = EVENT_FIELDS[field]
+        # IN (subquery) lets SQLite start from the contact_events indexes
+        return Contact.contactId.in_(
+            select(ContactEvent.contactId).where(
+                _compare(column, op, _coerce(field, kind, op, value))
+            )
+        )
+
+    if field in EVENT_JSON_FIELDS:
+        path, kind = EVENT_JSON_FIELDS[field]
+        value = _coerce(field, kind, op, value)
+        recent = func.json_each(func.json_text(Contact.events)).table_valued("value")
+        archived = func.json_each(func.archive_json(EventArchive.payload)).table_valued("value")
+        return or_(
+            exists(
+                select(literal(1)).select_from(recent).where(
+                    _compare(func.json_extract(recent.c.value, path), op, value)
+                )
+            ),
+            exists(
+                select(literal(1)).select_from(EventArchive).join(archived, true()).where(
+                    EventArchive.contactId == Contact.contactId,
+                    _compare(func.json_extract(archived.c.value, path), op, value)
+                )
+            )
+        )
+
+    if field in JSON_FIELDS:
+        column, path, kind = JSON_FIELDS[field]
+        if field == "nextActions.dueDate" and op in ("<", "<=") and value is not None:
+            # Some due date is before X <=> the earliest one is: use the
+            # indexed summary column instead of scanning the JSON
+            return _compare(Contact.nextDueDate, op, _coerce(field, "date", op, value))
+        if isinstance(column.type, CompressedJSON):
+            column = func.json_text(column)
+        items = func.json_each(column).table_valued("value")
+        item = items.c.value if path is None else func.json_extract(items.c.value, path)
+        if kind == "date":
+            # Compare normalized dates, as in the nextDueDate column used above
+            item = func.normalize_date(item)
+        return exists(
+            select(literal(1)).select_from(items).where(
+                _compare(item, op, _coerce(field, kind, op, value))
+            )
+        )
+
+    raise FilterSyntaxError(f"Unknown field '{field}', expected one of: {', '.join(FIELDS)}")
+
+
+def parse_filter(expression):
+    """
+    Parse a filter expression into a SQLAlchemy clause on Contact
+
+    Raises:
+        FilterSyntaxError: If the expression is invalid
+    """
+    return _Parser(tokenize(expression)).parse()
+
+
+def main():
+    from database import SessionLocal, explain_query_plan
+
+    if len(sys.argv) != 2:
+        print(__doc__)
+        return 1
+
+    try:
+        clause = parse_filter(sys.argv[1])
+    except FilterSyntaxError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    db = SessionLocal()
+    try:
+        query = db.query(Contact).filter(clause)
+        print(query.statement.compile(compile_kwargs={"literal_binds": True}))
+        print("─" * 60)
+        for detail in explain_query_plan(db, query.statement):
+            print(f"  {detail}")
+        print("─" * 60)
+        print(f"📇 {query.count()} contact(s)")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
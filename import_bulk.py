@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Import en masse de contacts depuis un fichier CSV ou vCard (.vcf)
+
+Le fichier est lu en flux et traité par paquets (--chunk-size lignes) :
+chaque paquet est validé d'un coup, rapproché des contacts existants
+(par contactId, puis email, puis téléphone) avec une requête indexée par
+champ, puis écrit dans sa propre transaction. La mémoire utilisée ne
+dépend que de la taille des paquets, pas de celle du fichier.
+
+Colonnes CSV reconnues (en-têtes français ou anglais, casse et accents
+ignorés) : nom/name (ou prénom + nom de famille), email/courriel,
+téléphone/phone/mobile, entreprise/company, poste/title, notes, contactId.
+
+Usage:
+    python import_bulk.py contacts.csv
+    python import_bulk.py carnet.vcf
+    python import_bulk.py contacts.csv --dry-run
+    python import_bulk.py contacts.csv --chunk-size 5000 --tenant acme
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import quopri
+import re
+import sys
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter, ValidationError, WrapValidator
+from sqlalchemy import func, update
+from typing import Annotated, List
+
+from contact_store import update_contact_summary
+from database import get_session, normalize_phone, use_tenant, Contact
+from models import ContactImportRow
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+# Normalized CSV header -> import field
+HEADER_ALIASES = {
+    "contactid": "contactId", "id": "contactId",
+    "name": "name", "nom": "name", "fullname": "name", "nomcomplet": "name",
+    "displayname": "name", "contactname": "name",
+    "firstname": "firstName", "prenom": "firstName", "givenname": "firstName",
+    "lastname": "lastName", "nomdefamille": "lastName", "familyname": "lastName",
+    "surname": "lastName",
+    "email": "email", "emailaddress": "email", "mail": "email", "courriel": "email",
+    "adressemail": "email", "primaryemail": "email",
+    "phone": "phone", "telephone": "phone", "tel": "phone", "mobile": "phone",
+    "mobilephone": "phone", "phonenumber": "phone", "portable": "phone",
+    "workphone": "phone", "businessphone": "phone",
+    "company": "company", "entreprise": "company", "societe": "company",
+    "organization": "company", "organisation": "company", "org": "company",
+    "companyname": "company",
+    "position": "position", "poste": "position", "title": "position",
+    "jobtitle": "position", "fonction": "position", "role": "position",
+    "notes": "notes", "note": "notes", "comment": "notes", "comments": "notes",
+    "commentaire": "notes", "commentaires": "notes",
+}
+
+SIMPLE_FIELDS = ("name", "email", "phone", "company", "position")
+
+
+def normalize_header(header):
+    """'Prénom ' -> 'prenom', 'E-mail Address' -> 'emailaddress'"""
+    header = unicodedata.normalize("NFKD", header or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", header.lower())
+
+
+def _to_row(values):
+    """Build the validation input of a row from its mapped fields"""
+    name = values.get("name") or " ".join(
+        part for part in (values.get("firstName"), values.get("lastName")) if part
+    )
+    row = {field: values.get(field) for field in ("contactId", "email", "phone", "company", "position")}
+    row["name"] = name
+    notes = (values.get("notes") or "").strip()
+    row["importantNotes"] = [notes] if notes else []
+    return row
+
+
+def read_csv_rows(f):
+    """
+    Yield (line number, row) from a CSV file object
+
+    The delimiter (",", ";" or tab) is detected from the beginning of the file.
+    """
+    sample = f.read(64 * 1024)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(f, dialect)
+
+    header = next(reader, None)
+    if header is None:
+        return
+    # Map the columns once; rows are then plain index lookups
+    columns = [(i, HEADER_ALIASES[normalize_header(h)])
+               for i, h in enumerate(header) if normalize_header(h) in HEADER_ALIASES]
+    fields = {field for _, field in columns}
+    if "firstName" in fields and "lastName" not in fields:
+        # "Prénom;Nom": here "Nom" is the family name
+        columns = [(i, "lastName" if field == "name" else field) for i, field in columns]
+    if not fields & {"name", "firstName", "lastName"}:
+        raise ValueError(f"Aucune colonne de nom reconnue dans l'en-tête : {', '.join(header)}")
+
+    for values in reader:
+        if not any(values):
+            continue
+        yield reader.line_num, _to_row({
+            field: values[i] for i, field in columns if i < len(values) and values[i]
+        })
+
+
+def _unescape_vcard(value):
+    return re.sub(r"\\([\\,;nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _vcard_lines(f):
+    """Yield (line number, unfolded logical line) of a vCard file"""
+    pending, start = None, 0
+    for line_no, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if pending is not None and line[:1] in (" ", "\t"):
+            pending += line[1:]
+            continue
+        if pending is not None and pending.endswith("=") and "QUOTED-PRINTABLE" in pending.split(":", 1)[0].upper():
+            # Quoted-printable soft line break (vCard 2.1)
+            pending = pending[:-1] + line
+            continue
+        if pending is not None:
+            yield start, pending
+        pending, start = line, line_no
+    if pending is not None:
+        yield start, pending
+
+
+def read_vcard_rows(f):
+    """Yield (line number of BEGIN:VCARD, row) from a vCard file object"""
+    card, start = None, 0
+    for line_no, line in _vcard_lines(f):
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        name, *params = key.split(";")
+        name = name.rsplit(".", 1)[-1].upper()  # "item1.EMAIL" -> "EMAIL"
+        params = [p.upper() for p in params]
+
+        if name == "BEGIN" and value.strip().upper() == "VCARD":
+            card, start = {}, line_no
+            continue
+        if card is None:
+            continue
+        if name == "END":
+            yield start, _to_row(card)
+            card = None
+            continue
+
+        if "ENCODING=QUOTED-PRINTABLE" in params or "QUOTED-PRINTABLE" in params:
+            charset = next((p.split("=", 1)[1] for p in params if p.startswith("CHARSET=")), "utf-8")
+            value = quopri.decodestring(value.encode("latin-1", "replace")).decode(charset, "replace")
+
+        if name == "FN":
+            card["name"] = _unescape_vcard(value)
+        elif name == "N":
+            parts = [_unescape_vcard(p) for p in re.split(r"(?<!\\);", value)] + ["", ""]
+            card.setdefault("lastName", parts[0])
+            card.setdefault("firstName", parts[1])
+        elif name == "EMAIL" and ("email" not in card or any("PREF" in p for p in params)):
+            card["email"] = _unescape_vcard(value)
+        elif name == "TEL" and ("phone" not in card or any("PREF" in p for p in params)):
+            card["phone"] = _unescape_vcard(value).removeprefix("tel:")
+        elif name == "ORG":
+            card["company"] = _unescape_vcard(re.split(r"(?<!\\);", value)[0])
+        elif name == "TITLE":
+            card["position"] = _unescape_vcard(value)
+        elif name == "NOTE":
+            card["notes"] = _unescape_vcard(value)
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _keep_errors(value, handler):
+    # Report an invalid row instead of failing the whole chunk
+    try:
+        return handler(value)
+    except ValidationError as e:
+        return e
+
+
+# Validates a whole chunk in one call; invalid rows come back as their ValidationError
+ROWS_ADAPTER = TypeAdapter(List[Annotated[ContactImportRow, WrapValidator(_keep_errors)]])
+
+
+def validate_chunk(chunk):
+    """
+    Validate a chunk of (line, row) in one call
+
+    Returns:
+        tuple: (list of (line, ContactImportRow), list of (line, error message))
+    """
+    results = ROWS_ADAPTER.validate_python([row for _, row in chunk])
+    valid, invalid = [], []
+    for (line, _), result in zip(chunk, results):
+        if isinstance(result, ValidationError):
+            invalid.append((line, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in result.errors()
+            )))
+        else:
+            valid.append((line, result))
+    return valid, invalid
+
+
+def _lookup(db, column, values):
+    """contactId of the existing contacts whose column is in values, keyed by that value"""
+    if not values:
+        return {}
+    return dict(db.query(column, Contact.contactId).filter(column.in_(values)))
+
+
+def upsert_chunk(db, rows):
+    """
+    Create or update the contacts of a validated chunk
+
+    Rows are matched to existing contacts by contactId, then email, then
+    phone, with one indexed IN query per field for the whole chunk. New
+    contacts are inserted and changed ones updated with one executemany each.
+
+    Returns:
+        dict: Rows created, updated, unchanged, and duplicates (rows matching a
+        contact already imported from an earlier row of the chunk)
+    """
+    ids = {r.contactId for _, r in rows if r.contactId}
+    by_id = {contact_id: contact_id for contact_id in _lookup(db, Contact.contactId, ids)}
+    by_email = _lookup(db, func.lower(Contact.email), {r.email for _, r in rows if r.email})
+    # Imported phones are normalized: compare with the normalized column
+    by_phone = _lookup(db, Contact.phoneKey, {r.phone for _, r in rows if r.phone})
+
+    # Compare on plain column values, without loading entities
+    matched_ids = set(by_id) | set(by_email.values()) | set(by_phone.values())
+    contacts = {row.contactId: SimpleNamespace(**row._mapping) for row in db.query(
+        Contact.contactId, Contact.importantNotes, *(getattr(Contact, field) for field in SIMPLE_FIELDS)
+    ).filter(Contact.contactId.in_(matched_ids))} if matched_ids else {}
+
+    new_contacts = {}  # contactId -> column values (namespace) of contacts to insert
+    updated_ids = set()
+    seen = set()
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "duplicates": 0}
+    for _, row in rows:
+        contact_id = (row.contactId and by_id.get(row.contactId)) \
+            or (row.email and by_email.get(row.email)) \
+            or (row.phone and by_phone.get(row.phone))
+        contact = contacts.get(contact_id) or new_contacts.get(contact_id)
+
+        if contact is None:
+            contact = SimpleNamespace(
+                contactId=row.contactId or str(uuid.uuid4()),
+                events="[]",
+                importantNotes=json.dumps(row.importantNotes, ensure_ascii=False),
+                nextActions="[]",
+                opportunities="[]",
+                archivedEventCount=0,
+                **{field: getattr(row, field) for field in SIMPLE_FIELDS}
+            )
+            new_contacts[contact.contactId] = contact
+            counts["created"] += 1
+        else:
+            changed = False
+            for field in SIMPLE_FIELDS:
+                value = getattr(row, field)
+                current = getattr(contact, field)
+                if field == "phone":
+                    # Same number in another format: keep it as entered
+                    current = normalize_phone(current)
+                if value is not None and value != current:
+                    setattr(contact, field, value)
+                    changed = True
+            notes = json.loads(contact.importantNotes) if contact.importantNotes else []
+            new_notes = [note for note in row.importantNotes if note not in notes]
+            if new_notes:
+                contact.importantNotes = json.dumps(notes + new_notes, ensure_ascii=False)
+                changed = True
+            if contact.contactId in contacts and changed:
+                contact.phoneKey = normalize_phone(contact.phone)
+                updated_ids.add(contact.contactId)
+            counts["duplicates" if contact.contactId in seen else "updated" if changed else "unchanged"] += 1
+        seen.add(contact.contactId)
+
+        # Later rows of the chunk (duplicates in the file) match this contact
+        by_id[contact.contactId] = contact.contactId
+        if contact.email:
+            by_email[contact.email.lower()] = contact.contactId
+        if contact.phone:
+            by_phone[normalize_phone(contact.phone)] = contact.contactId
+
+    if updated_ids:
+        # Only plain columns, phoneKey and importantNotes change: the other
+        # summary columns and contact_events rows stay valid, no need for sync_contact()
+        db.execute(update(Contact), [vars(contacts[contact_id]) for contact_id in updated_ids])
+
+    if new_contacts:
+        # Imported contacts have no events: only the summary columns need computing
+        for contact in new_contacts.values():
+            update_contact_summary(db, contact)
+        db.execute(Contact.__table__.insert(), [vars(c) for c in new_contacts.values()])
+
+    return counts
+
+
+def import_contacts(path, file_format=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Import a CSV or vCard file chunk by chunk
+
+    Args:
+        path (str): File to import
+        file_format (str): "csv" or "vcard" (default: from the file extension)
+        chunk_size (int): Rows validated and written per transaction
+        dry_run (bool): Validate and match without writing anything
+
+    Returns:
+        dict: Counters (rows, created, updated, unchanged, duplicates, invalid) and the first errors
+    """
+    file_format = file_format or ("vcard" if Path(path).suffix.lower() in (".vcf", ".vcard") else "csv")
+    stats = {"rows": 0, "created": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "invalid": 0, "errors": []}
+
+    db = get_session()
+    try:
+        with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+            rows = read_vcard_rows(f) if file_format == "vcard" else read_csv_rows(f)
+            for chunk in chunked(rows, chunk_size):
+                valid, invalid = validate_chunk(chunk)
+                counts = upsert_chunk(db, valid)
+                if dry_run:
+                    db.rollback()
+                else:
+                    db.commit()
+
+                stats["rows"] += len(chunk)
+                for name, count in counts.items():
+                    stats[name] += count
+                stats["invalid"] += len(invalid)
+                room = MAX_REPORTED_ERRORS - len(stats["errors"])
+                stats["errors"].extend(invalid[:max(room, 0)])
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Importe en masse des contacts depuis un fichier CSV ou vCard",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemples d'utilisation:
+  python import_bulk.py contacts.csv
+  python import_bulk.py carnet.vcf
+  python import_bulk.py contacts.csv --dry-run
+  python import_bulk.py contacts.csv --chunk-size 5000 --tenant acme
+        """
+    )
+    parser.add_argument(
+        'file',
+        help='Fichier CSV ou vCard (.vcf) à importer'
+    )
+    parser.add_argument(
+        '-f', '--format',
+        choices=['csv', 'vcard'],
+        help='Format du fichier (par défaut: selon l\'extension)'
+    )
+    parser.add_argument(
+        '-n', '--chunk-size',
+        type=int,
+        default=CHUNK_SIZE,
+        help=f'Lignes validées et écrites par transaction (défaut: {CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '-d', '--dry-run',
+        action='store_true',
+        help='Valider et rapprocher sans rien écrire'
+    )
+    parser.add_argument(
+        '-t', '--tenant',
+        help='Tenant dont la base est mise à jour (par défaut: base principale)'
+    )
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size doit être positif")
+    if not Path(args.file).exists():
+        print(f"❌ Fichier non trouvé: {args.file}", file=sys.stderr)
+        return 1
+    try:
+        use_tenant(args.tenant)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    try:
+        stats = import_contacts(args.file, args.format, args.chunk_size, args.dry_run)
+    except (ValueError, csv.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📥 Import {'(simulation) ' if args.dry_run else ''}de {args.file}")
+    print("─" * 60)
+    print(f"  Lignes lues    : {stats['rows']}")
+    print(f"  ➕ Créés        : {stats['created']}")
+    print(f"  🔄 Mis à jour   : {stats['updated']}")
+    print(f"  ⏸️  Inchangés    : {stats['unchanged']}")
+    print(f"  🔁 Doublons     : {stats['duplicates']}")
+    print(f"  ❌ Invalides    : {stats['invalid']}")
+    print("─" * 60)
+    rate = stats["rows"] / elapsed if elapsed else 0
+    print(f"⏱️  {elapsed:.1f} s ({rate:,.0f} lignes/s)".replace(",", " "))
+
+    if stats["errors"]:
+        print(f"\n⚠️  Lignes rejetées{' (premières)' if stats['invalid'] > len(stats['errors']) else ''}:")
+        for line, message in stats["errors"]:
+            print(f"  ligne {line} : {message}")
+    if args.dry_run:
+        print("\n🔍 Mode dry-run: aucune modification appliquée")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
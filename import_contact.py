@@ -6,6 +6,7 @@ Usage:
     python import_contact.py contact.yaml
     python import_contact.py marie.yaml --create-if-missing
     python import_contact.py jean.yaml --dry-run
+    python import_contact.py contact.yaml --tenant acme
 """
 
 import argparse
@@ -14,7 +15,9 @@ import yaml
 import json
 import uuid
 from pathlib import Path
-from database import SessionLocal, Contact
+from sqlalchemy import func
+from database import get_session, use_tenant, Contact
+from contact_store import get_all_events, sort_events, sync_contact
 
 
 def import_contact_from_yaml(yaml_file, create_if_missing=False, dry_run=False):
@@ -51,7 +54,7 @@ def import_contact_from_yaml(yaml_file, create_if_missing=False, dry_run=False):
         print(f"❌ Format YAML invalide: le fichier doit contenir un dictionnaire", file=sys.stderr)
         return False
 
-    db = SessionLocal()
+    db = get_session()
 
     try:
         existing_contact = None
@@ -67,7 +70,7 @@ def import_contact_from_yaml(yaml_file, create_if_missing=False, dry_run=False):
             # Si contactId absent, rechercher par name
             contact_name = contact_data['name']
             existing_contact = db.query(Contact).filter(
-                Contact.name.ilike(contact_name)).first()
+                func.lower(Contact.name) == func.lower(contact_name)).first()
             search_method = f"name '{contact_name}'"
         else:
             print(
@@ -125,7 +128,13 @@ def import_contact_from_yaml(yaml_file, create_if_missing=False, dry_run=False):
                 new_value = contact_data[field]
                 
                 # Comparer avec l'ancienne valeur
-                if existing_contact:
+                if existing_contact and field == 'events':
+                    # Exports list the archived events too, in sort_events() order:
+                    # the same events in another order are not a change
+                    old_value = get_all_events(db, existing_contact)
+                    if sort_events(new_value) == old_value:
+                        new_value = old_value
+                elif existing_contact:
                     old_json = getattr(existing_contact, field, None)
                     if old_json:
                         old_value = json.loads(old_json)
@@ -154,6 +163,7 @@ def import_contact_from_yaml(yaml_file, create_if_missing=False, dry_run=False):
             return True
         
         # Appliquer les changements
+        sync_contact(db, contact)
         db.commit()
         db.refresh(contact)
         
@@ -231,6 +241,7 @@ Exemples d'utilisation:
   python import_contact.py marie.yaml --create-if-missing
   python import_contact.py jean.yaml --dry-run
   python import_contact.py contact.yaml --preview
+  python import_contact.py contact.yaml --tenant acme
         """
     )
     
@@ -257,8 +268,19 @@ Exemples d'utilisation:
         help='Afficher un aperçu du fichier YAML sans l\'importer'
     )
     
+    parser.add_argument(
+        '-t', '--tenant',
+        help='Tenant dont la base est mise à jour (par défaut: base principale)'
+    )
+    
     args = parser.parse_args()
     
+    try:
+        use_tenant(args.tenant)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    
     # Si --preview est spécifié, afficher l'aperçu seulement
     if args.preview:
         success = preview_yaml_file(args.yaml_file)
@@ -1,10 +1,13 @@
 """
 Database initialization script with sample contact
 """
+import argparse
 import json
+import sys
 from datetime import datetime
 from sqlalchemy.orm import Session
-from database import engine, SessionLocal, init_db, Contact
+from database import get_session, init_db, use_tenant, Contact
+from contact_store import sync_contact
 
 def init_sample_data():
     """Initialize database with sample contact"""
@@ -13,7 +16,7 @@ def init_sample_data():
     init_db()
     
     # Create session
-    db = SessionLocal()
+    db = get_session()
     
     try:
         # Check if contacts already exist
@@ -71,6 +74,7 @@ def init_sample_data():
             createdAt=datetime.fromisoformat(sample_contact["createdAt"].replace('Z', '+00:00'))
         )
         
+        sync_contact(db, db_contact)
         db.add(db_contact)
         db.commit()
         
@@ -85,4 +89,12 @@ def init_sample_data():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Initialize the database with a sample contact")
+    parser.add_argument('-t', '--tenant', help='Tenant whose database is created (default: main database)')
+    args = parser.parse_args()
+    try:
+        use_tenant(args.tenant, must_exist=False)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
     init_sample_data()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test de charge : latence des lectures ponctuelles pendant une rafale de requêtes coûteuses
+
+Lance des lecteurs qui enchaînent des GET /api/contacts/{id} sur une
+application démarrée, d'abord seuls (référence), puis pendant une
+« tempête » de GET /api/stats et de listes complètes GET /api/contacts.
+Affiche les percentiles de latence des lectures ponctuelles pour les deux
+phases, les réponses 503 de la tempête et les métriques d'admission
+(GET /api/admin/admission).
+
+Usage:
+    python load_test.py
+    python load_test.py --url http://127.0.0.1:8000 --duration 20 --storm 32
+    python load_test.py --tenant acme
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+
+def percentiles(latencies):
+    """p50/p95/p99/max of latencies (s), in milliseconds"""
+    values = sorted(latencies)
+    if not values:
+        return {}
+    return {
+        name: round(values[min(len(values) - 1, int(fraction * len(values)))] * 1000, 1)
+        for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+    }
+
+
+def run_workers(count, worker, duration):
+    """Run count threads of worker(stop_event, results) for duration seconds"""
+    stop = threading.Event()
+    results = []
+    threads = [threading.Thread(target=worker, args=(stop, results), daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def point_reader(url, headers, contact_ids):
+    def worker(stop, results):
+        with httpx.Client(base_url=url, headers=headers, timeout=30) as client:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    status = client.get(f"/api/contacts/{random.choice(contact_ids)}").status_code
+                except httpx.HTTPError:
+                    status = None  # timeout or connection error
+                results.append((status, time.perf_counter() - start))
+    return worker
+
+
+def storm_worker(url, headers, paths):
+    def worker(stop, results):
+        with httpx.Client(base_url=url, headers=headers, timeout=60) as client:
+            while not stop.is_set():
+                path = random.choice(paths)
+                try:
+                    response = client.get(path)
+                except httpx.HTTPError:
+                    results.append((None, path))
+                    continue
+                results.append((response.status_code, path))
+                if response.status_code == 503:
+                    # Well-behaved clients wait before retrying (capped for the test)
+                    time.sleep(min(float(response.headers.get("Retry-After", 1)), 0.2))
+    return worker
+
+
+def print_latencies(label, results):
+    latencies = [elapsed for status, elapsed in results if status == 200]
+    errors = sum(1 for status, _ in results if status != 200)
+    values = percentiles(latencies)
+    print(f"  {label:12} : {len(latencies):6} lectures  "
+          + "  ".join(f"{name} {value} ms" for name, value in values.items())
+          + (f"  ({errors} erreur(s))" if errors else ""))
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesure la latence des lectures ponctuelles pendant une rafale de requêtes coûteuses"
+    )
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL de l\'application (défaut: %(default)s)')
+    parser.add_argument('--duration', type=float, default=10, help='Durée de chaque phase en secondes (défaut: %(default)s)')
+    parser.add_argument('--readers', type=int, default=4, help='Lecteurs ponctuels concurrents (défaut: %(default)s)')
+    parser.add_argument('--storm', type=int, default=32, help='Clients de la tempête stats/liste (défaut: %(default)s)')
+    parser.add_argument('--storm-paths', default='/api/stats,/api/stats,/api/contacts',
+                        help='Routes de la tempête, tirées au hasard (défaut: %(default)s)')
+    parser.add_argument('-t', '--tenant', help='Tenant visé (en-tête X-Tenant-ID)')
+    args = parser.parse_args()
+
+    headers = {"X-Tenant-ID": args.tenant} if args.tenant else {}
+    storm_paths = [path.strip() for path in args.storm_paths.split(",") if path.strip()]
+    try:
+        response = httpx.get(f"{args.url}/api/contacts", params={"limit": 500}, headers=headers, timeout=30)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"❌ Application injoignable sur {args.url}: {e}", file=sys.stderr)
+        return 1
+    contact_ids = [contact["contactId"] for contact in response.json()]
+    if not contact_ids:
+        print("❌ Aucun contact : importez des données avant le test", file=sys.stderr)
+        return 1
+
+    print(f"\n🔥 Test de charge sur {args.url} ({args.readers} lecteurs, {args.storm} clients en tempête)")
+    print("─" * 60)
+    reader = point_reader(args.url, headers, contact_ids)
+    baseline = run_workers(args.readers, reader, args.duration)
+    print_latencies("Référence", baseline)
+
+    storm_results = []
+    storm_thread = threading.Thread(
+        target=lambda: storm_results.extend(run_workers(args.storm, storm_worker(args.url, headers, storm_paths), args.duration)),
+        daemon=True
+    )
+    storm_thread.start()
+    time.sleep(min(1.0, args.duration / 10))  # let the storm build up
+    during = run_workers(args.readers, reader, args.duration)
+    storm_thread.join()
+    print_latencies("Tempête", during)
+
+    print("─" * 60)
+    for path in dict.fromkeys(storm_paths):
+        statuses = [status for status, p in storm_results if p == path]
+        refused = statuses.count(503)
+        failed = statuses.count(None)
+        print(f"  {path:14} : {len(statuses) - refused - failed} servies, {refused} refusées (503)"
+              + (f", {failed} en échec (timeout)" if failed else ""))
+
+    try:
+        admission = httpx.get(f"{args.url}/api/admin/admission", headers=headers, timeout=30).json()
+    except httpx.HTTPError as e:
+        print(f"\n⚠️  Métriques d'admission indisponibles: {e}")
+        return 0
+    print("\n📊 Admission (attente en file, ms):")
+    for name, status in admission.items():
+        waits = status["waitMs"]
+        print(f"  {name:10} : {status['admitted']} admises, {status['rejected']} refusées, "
+              f"{status['timedOut']} expirées — p50 {waits['p50']}  p99 {waits['p99']}  max {waits['max']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,45 @@
 """
 FastAPI application for contact management
 """
-from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from pydantic import TypeAdapter
+from typing import List, Optional
+import asyncio
 import json
+import sys
+import threading
 import uuid
 import subprocess
 from datetime import datetime
 
-from database import get_db, init_db, Contact
-from models import ContactCreate, ContactUpdate, ContactResponse
+from sqlalchemy import func, literal_column, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import load_only
+from contact_store import (
+    sync_contact, purge_contact, contacts_with_old_events, archive_contacts_events,
+    pending_upgrades, set_database_version,
+    get_archived_events, get_all_events, get_event_notes, normalize_event_date
+)
+from admission import AdmissionControl, AdmissionMiddleware
+from change_feed import ChangeFeed
+from filter_query import parse_filter, FilterSyntaxError
+from database import (
+    get_db, get_session, init_db, open_engines, database_files, tenant_engines, current_tenant,
+    DEFAULT_TENANT, Contact, ContactEvent, CONTACT_FIELDS
+)
+from models import (
+    ContactCreate, ContactUpdate, ContactResponse, ContactSuggestion,
+    ArchivedEventsPage, TimelinePage, ContactBatchGetRequest, ContactBatchGetResponse
+)
+from maintenance import MaintenanceScheduler, add_database_tasks, for_each_database, task_interval
+from search_index import NameIndex
+from tenancy import TenantMiddleware
+from write_queue import WriteQueue
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -48,14 +74,215 @@ app = FastAPI(
     openapi_tags=[
         {"name": "Home"},
         {"name": "Contacts", "description": "Gestion des contacts"},
-        {"name": "Statistiques", "description": "Statistiques"}
+        {"name": "Événements", "description": "Chronologie globale des événements"},
+        {"name": "Statistiques", "description": "Statistiques"},
+        {"name": "Administration", "description": "Maintenance de la base"}
     ],
 )
 
+# Expensive routes run with a concurrency limit and a bounded queue (503 +
+# Retry-After beyond it) so they cannot take every worker thread; point
+# reads, writes and the event stream are not limited. These routes are
+# plain functions: they run in the threadpool, not on the event loop.
+admission = AdmissionControl()
+admission.add_rule("stats", "GET", "/api/stats", concurrency=2, queue=8)
+admission.add_rule("contacts", "GET", "/api/contacts", concurrency=1, queue=8,
+                   when=lambda params: "limit" not in params)  # unpaginated listings only
+admission.add_rule("batch-get", "POST", "/api/contacts/batch-get", concurrency=4, queue=16)
+app.add_middleware(AdmissionMiddleware, control=admission)
+
+# Route each request to its tenant's database (X-Tenant-ID header or /t/{tenant}/ prefix)
+app.add_middleware(TenantMiddleware)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+# Writers grouping concurrent writes into shared commits: one writer thread
+# per tenant (the job key), closed with the tenant's engine
+write_queue = WriteQueue(get_session)
+
+
+# Running database upgrades: tenant -> thread
+_upgrade_threads = {}
+_upgrade_lock = threading.Lock()
+
+
+def upgrade_database(tenant):
+    """
+    Apply the upgrades a tenant's database has not had yet, one write job per batch
+
+    Each batch (a few ms to a few tens of ms) is waited for, so API writes
+    queued meanwhile go in between instead of waiting for a full-table backfill.
+    The version is recorded once all the batches of an upgrade are done: an
+    interrupted upgrade starts over at the next opening.
+
+    Returns:
+        list: Versions applied
+    """
+    db = get_session(tenant)
+    try:
+        upgrades = pending_upgrades(db)
+    finally:
+        db.close()
+
+    for version, steps in upgrades:
+        for step in steps:
+            after = ""
+            while after is not None:
+                after = write_queue.submit(
+                    lambda db, step=step, after=after: step(db, after), key=tenant
+                ).result()
+        write_queue.submit(lambda db, version=version: set_database_version(db, version), key=tenant).result()
+    return [version for version, _ in upgrades]
+
+
+def _run_upgrade(tenant):
+    try:
+        upgrade_database(tenant)
+    except Exception as e:
+        print(f"❌ Mise à niveau de la base {tenant} : {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def submit_startup_jobs(tenant):
+    """
+    Upgrade the derived data of an older database in a background thread (a no-op once done)
+
+    Returns:
+        threading.Thread: The tenant's upgrade thread (join() to wait for it)
+    """
+    with _upgrade_lock:
+        thread = _upgrade_threads.get(tenant)
+        if thread is None or not thread.is_alive():
+            thread = _upgrade_threads[tenant] = threading.Thread(
+                target=_run_upgrade, args=(tenant,), name=f"upgrade-{tenant}", daemon=True)
+            thread.start()
+    return thread
+
+
+# Contacts archived per write job of the archive sweep (~3 ms each when
+# they have events to move): API writes queued behind a job wait a few tens of ms
+ARCHIVE_BATCH_SIZE = 10
+
+
+def archive_events(tenant):
+    """Move a tenant's events past the archive age out of the contacts, one write job per batch"""
+    db = get_session(tenant)
+    try:
+        contact_ids = contacts_with_old_events(db)
+    finally:
+        db.close()
+
+    archived = 0
+    for i in range(0, len(contact_ids), ARCHIVE_BATCH_SIZE):
+        batch = contact_ids[i:i + ARCHIVE_BATCH_SIZE]
+        # Wait for each batch: API writes queued meanwhile go in between
+        archived += write_queue.submit(
+            lambda db, batch=batch: archive_contacts_events(db, batch), key=tenant
+        ).result()
+    return archived
+
+
+def archive_open_databases():
+    """Move events past the archive age out of the default and open tenant databases"""
+    return for_each_database(open_engines(), lambda tenant, _: f"{archive_events(tenant)} event(s) archived")
+
+
+# Database maintenance (statistics, vacuum, WAL checkpoints, backups),
+# postponed while writes are queued
+maintenance = MaintenanceScheduler(is_busy=lambda: write_queue.pending > 0)
+add_database_tasks(maintenance, open_engines, database_files)
+# Also runs shortly after startup
+maintenance.add_task("archive", archive_open_databases, task_interval("archive"))
+maintenance.add_task(
+    "tenants",
+    lambda: f"{tenant_engines.evict_idle()} idle tenant engine(s) closed, "
+            f"{len(tenant_engines.open_engines())} open",
+    task_interval("tenants")
+)
+
+# Prefix indexes for autocomplete, one per tenant: built on first use (at
+# startup for the default database), updated on writes and dropped when the
+# tenant's engine is closed
+name_indexes = {}
+
+
+def build_name_index(tenant):
+    """Load names, companies and emails of a tenant's contacts into its index"""
+    index = NameIndex()
+    db = get_session(tenant)
+    try:
+        index.build(db.query(
+            Contact.contactId, Contact.name, Contact.company, Contact.email
+        ))
+    finally:
+        db.close()
+    # A concurrent build may have registered an index first: keep that one
+    return name_indexes.setdefault(tenant, index)
+
+
+async def get_name_index(tenant):
+    """Autocomplete index of a tenant, built (off the event loop) on first use"""
+    index = name_indexes.get(tenant)
+    if index is None:
+        index = await run_in_threadpool(build_name_index, tenant)
+    return index
+
+
+def close_tenant(tenant):
+    """Drop what was kept for a tenant whose engine was closed"""
+    name_indexes.pop(tenant, None)
+    write_queue.close(tenant)
+
+
+tenant_engines.on_open = submit_startup_jobs
+tenant_engines.on_evict = close_tenant
+
+# Change notifications pushed to the UI over Server-Sent Events (GET /api/changes)
+changes = ChangeFeed()
+# Stats are recomputed at most once per delay (s) per tenant after writes
+STATS_PUSH_DELAY = 0.5
+_stats_pending = set()
+_background_tasks = set()
+
+
+def publish_contact_change(tenant, change):
+    """Notify the tenant's event streams of a contact change, then of the new stats"""
+    changes.publish(tenant, "contact", change)
+    if changes.has_subscribers(tenant) and tenant not in _stats_pending:
+        _stats_pending.add(tenant)
+        task = asyncio.create_task(push_stats(tenant))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def push_stats(tenant):
+    """Publish the tenant's stats once the current burst of writes is over"""
+    await asyncio.sleep(STATS_PUSH_DELAY)
+    # Writes from now on schedule another push
+    _stats_pending.discard(tenant)
+
+    def read_stats():
+        db = get_session(tenant)
+        try:
+            return compute_stats(db)
+        finally:
+            db.close()
+
+    changes.publish(tenant, "stats", await run_in_threadpool(read_stats))
+
+
+@app.exception_handler(OperationalError)
+async def database_error_handler(request: Request, exc: OperationalError):
+    """A tenant database locked by another process (busy_timeout exceeded): 503, retry later"""
+    if "database is locked" not in str(exc.orig):
+        raise exc
+    return JSONResponse(
+        {"detail": "Database busy, retry later"},
+        status_code=503,
+        headers={"Retry-After": "1"}
+    )
+
 
 # ============= VERSION INFO =============
 
@@ -102,10 +329,21 @@ def get_version_info():
 @app.on_event("startup")
 def startup_event():
     init_db()
+    build_name_index(DEFAULT_TENANT)
+    # Tenant databases are upgraded when they are opened
+    submit_startup_jobs(DEFAULT_TENANT)
+    maintenance.start()
     # Store version info in app state
     app.state.version_info = get_version_info()
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    maintenance.stop()
+    # Commit whatever is still queued before exiting
+    write_queue.stop()
+
+
 # ============= WEB ROUTES =============
 
 @app.get("/", response_class=HTMLResponse, tags=["Home"])
@@ -120,14 +358,16 @@ async def home(request: Request):
     })
     return templates.TemplateResponse("index.html", {
         "request": request,
-        "version": version_info
+        "version": version_info,
+        # "/t/{tenant}" when the UI is served under a tenant prefix
+        "api_base": request.scope.get("root_path", "")
     })
 
 
 # ============= API ENDPOINTS =============
 
 @app.post("/api/contacts", response_model=ContactResponse, status_code=201, tags=["Contacts"])
-async def create_contact(contact: ContactCreate, db: Session = Depends(get_db)):
+async def create_contact(contact: ContactCreate):
     """Create a new contact record"""
 
     # Generate unique UUID for the contact
@@ -149,19 +389,61 @@ async def create_contact(contact: ContactCreate, db: Session = Depends(get_db)):
             [o.model_dump() for o in contact.opportunities], ensure_ascii=False)
     )
 
-    db.add(db_contact)
-    db.commit()
-    db.refresh(db_contact)
+    def write(db):
+        sync_contact(db, db_contact)
+        db.add(db_contact)
+        db.flush()
+        return db_contact.to_dict()
+
+    tenant = current_tenant.get()
+    result = await write_queue.run(write, key=tenant)
+    (await get_name_index(tenant)).upsert(result)
+    publish_contact_change(tenant, {"op": "create", "contact": result})
+    return result
+
+
+# Columns accepted by the `sort` parameter of GET /api/contacts
+SORT_COLUMNS = {
+    "createdAt": Contact.createdAt,
+    "name": Contact.name,
+    "lastEventAt": Contact.lastEventAt,
+    "nextDueDate": Contact.nextDueDate,
+    "opportunityValue": Contact.opportunityValue,
+    "eventCount": Contact.eventCount,
+}
+
 
-    return db_contact.to_dict()
+def parse_date_param(name, value):
+    """Normalize a date query parameter, or fail with 400"""
+    if value is None:
+        return None
+    normalized = normalize_event_date(value)
+    if normalized is None:
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}' date: {value}")
+    return normalized
+
+
+# Listings are validated and encoded inside the endpoint, in the threadpool:
+# left to FastAPI, encoding a full listing would block the event loop
+CONTACT_LIST_ADAPTER = TypeAdapter(List[ContactResponse])
 
 
 @app.get("/api/contacts", response_model=List[ContactResponse], tags=["Contacts"])
-async def get_contacts(
+def get_contacts(
     search: str = None,
+    filter: Optional[str] = Query(None, description='Filter expression, e.g. company = "ACME" and opportunities.estimatedValue > 10000'),
+    sort: str = Query("-createdAt", description="Column to sort by, prefix with '-' for descending"),
+    minValue: Optional[float] = None,
+    maxValue: Optional[float] = None,
+    lastEventFrom: Optional[str] = None,
+    lastEventTo: Optional[str] = None,
+    dueFrom: Optional[str] = None,
+    dueTo: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
-    """Get list of all contacts with optional search"""
+    """Get list of all contacts with optional search, filter expression, sorting, range filters and pagination"""
 
     query = db.query(Contact)
 
@@ -175,85 +457,269 @@ async def get_contacts(
             (Contact.position.like(search_filter))
         )
 
-    contacts = query.order_by(Contact.createdAt.desc()).all()
-    return [contact.to_dict() for contact in contacts]
+    # Structured filter expression (see filter_query.py)
+    if filter:
+        try:
+            query = query.filter(parse_filter(filter))
+        except FilterSyntaxError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {e}")
+
+    # Range filters on the summary columns (`...From` inclusive, `...To` exclusive)
+    if minValue is not None:
+        query = query.filter(Contact.opportunityValue >= minValue)
+    if maxValue is not None:
+        query = query.filter(Contact.opportunityValue <= maxValue)
+    if lastEventFrom:
+        query = query.filter(Contact.lastEventAt >= parse_date_param("lastEventFrom", lastEventFrom))
+    if lastEventTo:
+        query = query.filter(Contact.lastEventAt < parse_date_param("lastEventTo", lastEventTo))
+    if dueFrom:
+        query = query.filter(Contact.nextDueDate >= parse_date_param("dueFrom", dueFrom))
+    if dueTo:
+        query = query.filter(Contact.nextDueDate < parse_date_param("dueTo", dueTo))
+
+    descending = sort.startswith("-")
+    sort_column = SORT_COLUMNS.get(sort.lstrip("-"))
+    if sort_column is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort '{sort}', expected one of: {', '.join(SORT_COLUMNS)}"
+        )
+
+    if sort_column is Contact.createdAt:
+        tie_breaker = Contact.contactId
+    else:
+        # Every single-column index ends with the rowid, so this tie-breaker
+        # keeps the order stable without an extra sort
+        tie_breaker = literal_column("contacts.rowid")
+    if descending:
+        query = query.order_by(sort_column.desc(), tie_breaker.desc())
+    else:
+        query = query.order_by(sort_column.asc(), tie_breaker.asc())
+
+    if limit is not None:
+        query = query.offset(offset).limit(limit)
+
+    contacts = query.all()
+    return Response(
+        CONTACT_LIST_ADAPTER.dump_json(
+            CONTACT_LIST_ADAPTER.validate_python([contact.to_dict() for contact in contacts])
+        ),
+        media_type="application/json"
+    )
+
+
+# Maximum number of IDs per "IN (...)" query (SQLite bound parameter limit)
+BATCH_GET_CHUNK_SIZE = 500
+
+
+@app.post("/api/contacts/batch-get", response_model=ContactBatchGetResponse, tags=["Contacts"])
+def batch_get_contacts(request: ContactBatchGetRequest, db: Session = Depends(get_db)):
+    """Get several contacts by ID in one call (optional field projection)"""
+
+    fields = request.fields
+    if fields:
+        unknown = [f for f in fields if f not in CONTACT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        if "contactId" not in fields:
+            fields = ["contactId"] + fields
+
+    # Deduplicate while keeping the request order
+    contact_ids = list(dict.fromkeys(request.contactIds))
+
+    query = db.query(Contact)
+    if fields:
+        # Do not even read the columns that were not requested
+        query = query.options(load_only(*[getattr(Contact, f) for f in fields]))
+
+    found = {}
+    for i in range(0, len(contact_ids), BATCH_GET_CHUNK_SIZE):
+        chunk = contact_ids[i:i + BATCH_GET_CHUNK_SIZE]
+        for contact in query.filter(Contact.contactId.in_(chunk)):
+            found[contact.contactId] = contact.to_dict(fields)
+
+    return {
+        "contacts": [found[cid] for cid in contact_ids if cid in found],
+        "missing": [cid for cid in contact_ids if cid not in found]
+    }
+
+
+@app.get("/api/contacts/suggest", response_model=List[ContactSuggestion], tags=["Contacts"])
+async def suggest_contacts(q: str = "", limit: int = Query(10, ge=1, le=50)):
+    """Autocomplete contacts by name, company or email prefix (in-memory index)"""
+
+    index = await get_name_index(current_tenant.get())
+    return index.suggest(q, limit=limit)
 
 
 @app.get("/api/contacts/{contact_id}", response_model=ContactResponse, tags=["Contacts"])
-async def get_contact(contact_id: str, db: Session = Depends(get_db)):
-    """Get a specific contact record by ID"""
+async def get_contact(
+    contact_id: str,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get a specific contact record by ID (recent events only unless include_archived)"""
 
     contact = db.query(Contact).filter(Contact.contactId == contact_id).first()
 
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
 
-    return contact.to_dict()
+    result = contact.to_dict()
+    if include_archived:
+        result["events"] = get_all_events(db, contact)
+    return result
 
 
-@app.put("/api/contacts/{contact_id}", response_model=ContactResponse, tags=["Contacts"])
-async def update_contact(
+@app.get("/api/contacts/{contact_id}/events/archive", response_model=ArchivedEventsPage, tags=["Contacts"])
+async def get_contact_archived_events(
     contact_id: str,
-    contact_update: ContactUpdate,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
     db: Session = Depends(get_db)
 ):
-    """Update an existing contact record"""
+    """Page through the archived (older) events of a contact, newest first"""
 
-    contact = db.query(Contact).filter(Contact.contactId == contact_id).first()
-
-    if not contact:
+    if not db.query(Contact.contactId).filter(Contact.contactId == contact_id).first():
         raise HTTPException(status_code=404, detail="Contact not found")
 
+    events, total = get_archived_events(db, contact_id, offset, limit)
+    return {
+        "contactId": contact_id,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "events": events
+    }
+
+
+@app.put("/api/contacts/{contact_id}", response_model=ContactResponse, tags=["Contacts"])
+async def update_contact(
+    contact_id: str,
+    contact_update: ContactUpdate
+):
+    """Update an existing contact record"""
+
     # Update provided fields
     update_data = contact_update.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        if field in ['events', 'nextActions', 'opportunities']:
-            # model_dump() already returns dictionaries
-            setattr(contact, field, json.dumps(value, ensure_ascii=False))
-        elif field == 'importantNotes':
-            setattr(contact, field, json.dumps(value, ensure_ascii=False))
-        else:
-            setattr(contact, field, value)
+    def write(db):
+        contact = db.query(Contact).filter(Contact.contactId == contact_id).first()
+
+        if not contact:
+            raise HTTPException(status_code=404, detail="Contact not found")
 
-    db.commit()
-    db.refresh(contact)
+        for field, value in update_data.items():
+            if field in ['events', 'nextActions', 'opportunities']:
+                # model_dump() already returns dictionaries
+                setattr(contact, field, json.dumps(value, ensure_ascii=False))
+            elif field == 'importantNotes':
+                setattr(contact, field, json.dumps(value, ensure_ascii=False))
+            else:
+                setattr(contact, field, value)
 
-    return contact.to_dict()
+        sync_contact(db, contact)
+        db.flush()
+        return contact.to_dict()
+
+    tenant = current_tenant.get()
+    result = await write_queue.run(write, key=tenant)
+    (await get_name_index(tenant)).upsert(result)
+    publish_contact_change(tenant, {"op": "update", "contact": result})
+    return result
 
 
 @app.delete("/api/contacts/{contact_id}", tags=["Contacts"])
-async def delete_contact(contact_id: str, db: Session = Depends(get_db)):
+async def delete_contact(contact_id: str):
     """Delete a contact record"""
 
-    contact = db.query(Contact).filter(Contact.contactId == contact_id).first()
+    def write(db):
+        contact = db.query(Contact).filter(Contact.contactId == contact_id).first()
 
-    if not contact:
-        raise HTTPException(status_code=404, detail="Contact not found")
+        if not contact:
+            raise HTTPException(status_code=404, detail="Contact not found")
+
+        purge_contact(db, contact)
+        db.delete(contact)
 
-    db.delete(contact)
-    db.commit()
+    tenant = current_tenant.get()
+    await write_queue.run(write, key=tenant)
+    (await get_name_index(tenant)).remove(contact_id)
+    publish_contact_change(tenant, {"op": "delete", "contactId": contact_id})
 
     return {"message": "Contact deleted successfully", "contactId": contact_id}
 
 
-@app.get("/api/stats", tags=["Statistiques"])
-async def get_stats(db: Session = Depends(get_db)):
-    """Get statistics about contacts"""
+@app.get("/api/events", response_model=TimelinePage, tags=["Événements"])
+async def get_events(
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Events of all contacts, newest first (`from` inclusive, `to` exclusive)"""
+
+    query = db.query(
+        ContactEvent.id, ContactEvent.sortDate, ContactEvent.date,
+        ContactEvent.type, ContactEvent.contactId, ContactEvent.archiveId,
+        ContactEvent.position, Contact.name
+    ).join(Contact, Contact.contactId == ContactEvent.contactId)
+
+    for name, value in (("from", date_from), ("to", date_to)):
+        if value and normalize_event_date(value) is None:
+            raise HTTPException(status_code=400, detail=f"Invalid '{name}' date: {value}")
+    if date_from:
+        query = query.filter(ContactEvent.sortDate >= normalize_event_date(date_from))
+    if date_to:
+        query = query.filter(ContactEvent.sortDate < normalize_event_date(date_to))
+    if type:
+        query = query.filter(ContactEvent.type == type)
+
+    # Cursor is "<sortDate>|<id>" of the last event of the previous page
+    if cursor:
+        try:
+            cursor_date, cursor_id = cursor.rsplit("|", 1)
+            cursor_id = int(cursor_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(
+            tuple_(ContactEvent.sortDate, ContactEvent.id) < tuple_(cursor_date, cursor_id)
+        )
 
-    total_contacts = db.query(Contact).count()
+    rows = query.order_by(
+        ContactEvent.sortDate.desc(), ContactEvent.id.desc()
+    ).limit(limit + 1).all()
 
-    contacts = db.query(Contact).all()
-    total_opportunities = 0
-    total_value = 0.0
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].sortDate}|{rows[-1].id}"
 
-    for contact in contacts:
-        if contact.opportunities:
-            opps = json.loads(contact.opportunities)
-            total_opportunities += len(opps)
-            for opp in opps:
-                if 'estimatedValue' in opp and opp['estimatedValue']:
-                    total_value += float(opp['estimatedValue'])
+    return {
+        "events": [
+            {
+                "contactId": row.contactId,
+                "contactName": row.name,
+                "date": row.date,
+                "type": row.type or "",
+                "notes": notes
+            }
+            for row, notes in zip(rows, get_event_notes(db, rows))
+        ],
+        "nextCursor": next_cursor
+    }
+
+
+def compute_stats(db):
+    """Contact and opportunity totals, from the summary columns"""
+    total_contacts, total_opportunities, total_value = db.query(
+        func.count(Contact.contactId),
+        func.coalesce(func.sum(Contact.opportunityCount), 0),
+        func.coalesce(func.sum(Contact.opportunityValue), 0.0)
+    ).one()
 
     return {
         "totalContacts": total_contacts,
@@ -262,6 +728,54 @@ async def get_stats(db: Session = Depends(get_db)):
     }
 
 
+@app.get("/api/stats", tags=["Statistiques"])
+def get_stats(db: Session = Depends(get_db)):
+    """Get statistics about contacts"""
+
+    return compute_stats(db)
+
+
+@app.get("/api/changes", tags=["Contacts"])
+async def get_changes(request: Request):
+    """
+    Server-Sent Events stream of changes made through the API
+
+    Events: `contact` ({"op": "create" or "update", "contact": {...}} or
+    {"op": "delete", "contactId": ...}), `stats` (same values as
+    /api/stats) and `resync` (events were missed: reload the list).
+    Reconnecting clients send Last-Event-ID to receive the events they missed.
+    """
+    return StreamingResponse(
+        changes.stream(current_tenant.get(), request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ============= ADMINISTRATION =============
+
+@app.get("/api/admin/maintenance", tags=["Administration"])
+async def get_maintenance():
+    """Maintenance tasks, their schedule and the history of past runs"""
+    return maintenance.status()
+
+
+@app.get("/api/admin/admission", tags=["Administration"])
+async def get_admission():
+    """Limits, queue lengths, refusals and queue wait times of the limited routes"""
+    return admission.status()
+
+
+@app.post("/api/admin/maintenance/{task}", status_code=202, tags=["Administration"])
+async def run_maintenance_task(task: str):
+    """Run a maintenance task as soon as possible"""
+    try:
+        maintenance.run_now(task)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown maintenance task '{task}'")
+    return {"task": task, "scheduled": True}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Background maintenance of the SQLite database
+
+A scheduler thread started with the API runs each task on its own interval:
+- optimize:   PRAGMA optimize (ANALYZE the first time) for the query planner
+- vacuum:     PRAGMA incremental_vacuum, a few pages at a time
+- checkpoint: PRAGMA wal_checkpoint(PASSIVE), which never blocks writers
+- backup:     online snapshot (sqlite3 backup API) into backup/, 30-day retention
+
+The database tasks cover the default database and every open tenant
+database; backups cover every tenant file.
+
+Tasks run one at a time and are postponed while writes are pending; vacuum
+and backup work in small steps with pauses in between, so API requests are
+not stalled behind them.
+
+Usage (run tasks once, outside the API):
+    python maintenance.py optimize checkpoint backup
+    python maintenance.py vacuum --full   # convert an existing database to incremental auto-vacuum
+    python maintenance.py backup --tenant acme
+"""
+import argparse
+import collections
+import glob
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Task intervals in seconds, overridable with CRM_MAINTENANCE_<TASK>_INTERVAL (0 disables)
+DEFAULT_INTERVALS = {
+    "optimize": 3600,
+    "checkpoint": 300,
+    "vacuum": 6 * 3600,
+    "backup": 24 * 3600,
+    "archive": 24 * 3600,
+    "tenants": 60,
+}
+
+# Delay before the first run of each task after startup
+START_DELAY = float(os.getenv("CRM_MAINTENANCE_START_DELAY", "60"))
+
+# How long a task may be postponed while writes are pending
+MAX_POSTPONE = 60.0
+POSTPONE_STEP = 2.0
+
+VACUUM_STEP_PAGES = 200
+VACUUM_MAX_DURATION = 5.0
+
+BACKUP_DIR = os.getenv(
+    "CRM_BACKUP_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "backup"))
+BACKUP_RETENTION_DAYS = int(os.getenv("CRM_BACKUP_RETENTION_DAYS", "30"))
+BACKUP_STEP_PAGES = 1000
+BACKUP_MAX_RESTARTS = 3
+
+STEP_PAUSE = 0.05
+
+
+def task_interval(name):
+    """Interval (s) of a task, from the environment or DEFAULT_INTERVALS"""
+    value = os.getenv(f"CRM_MAINTENANCE_{name.upper()}_INTERVAL")
+    return float(value) if value else DEFAULT_INTERVALS[name]
+
+
+def _raw_connection(engine):
+    """Pooled DBAPI connection (autocommit: see database._configure_sqlite)"""
+    return engine.raw_connection()
+
+
+def _pragma(connection, name):
+    return connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def run_optimize(engine):
+    """Refresh planner statistics (full ANALYZE if there are none yet)"""
+    connection = _raw_connection(engine)
+    try:
+        has_stats = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        # executescript() steps the statement to completion
+        connection.driver_connection.executescript("ANALYZE;" if not has_stats else "PRAGMA optimize;")
+        return "ANALYZE" if not has_stats else "PRAGMA optimize"
+    finally:
+        connection.close()
+
+
+def run_checkpoint(engine):
+    """Copy the WAL back into the database without waiting for readers or writers"""
+    connection = _raw_connection(engine)
+    try:
+        busy, log_pages, checkpointed = connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return f"{checkpointed}/{log_pages} WAL pages checkpointed" + (" (busy)" if busy else "")
+    finally:
+        connection.close()
+
+
+def run_incremental_vacuum(engine, step_pages=VACUUM_STEP_PAGES, max_duration=VACUUM_MAX_DURATION):
+    """Return free pages to the filesystem, step_pages at a time"""
+    connection = _raw_connection(engine)
+    try:
+        if _pragma(connection, "auto_vacuum") != 2:
+            return "skipped: auto_vacuum is not INCREMENTAL (run `python maintenance.py vacuum --full` once)"
+
+        freed = 0
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            free = _pragma(connection, "freelist_count")
+            if not free:
+                break
+            connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum({min(free, step_pages)});")
+            freed += free - _pragma(connection, "freelist_count")
+            time.sleep(STEP_PAUSE)
+        return f"{freed} page(s) freed, {_pragma(connection, 'freelist_count')} left"
+    finally:
+        connection.close()
+
+
+def run_full_vacuum(engine):
+    """Rewrite the database with incremental auto-vacuum enabled (blocks writers)"""
+    connection = _raw_connection(engine)
+    try:
+        connection.driver_connection.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+        return f"VACUUM done, auto_vacuum={_pragma(connection, 'auto_vacuum')}"
+    finally:
+        connection.close()
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def run_backup(path, backup_dir=None, retention_days=None):
+    """
+    Snapshot a database file into backup_dir and delete backups past retention
+
+    The copy goes BACKUP_STEP_PAGES at a time with pauses. A write from
+    another connection restarts an online backup, so after
+    BACKUP_MAX_RESTARTS restarts it is done in a single step instead.
+    Databases unchanged since their last backup are skipped, and the most
+    recent backup of a database is always kept.
+    """
+    backup_dir = backup_dir or BACKUP_DIR
+    retention_days = BACKUP_RETENTION_DAYS if retention_days is None else retention_days
+    if not path or path == ":memory:":
+        return "skipped: in-memory database"
+
+    os.makedirs(backup_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    backups = sorted(glob.glob(os.path.join(backup_dir, f"{stem}_backup_*.db")), key=os.path.getmtime)
+
+    modified = max(os.path.getmtime(f) for f in (path, path + "-wal") if os.path.exists(f))
+    if backups and os.path.getmtime(backups[-1]) > modified:
+        return f"skipped: unchanged since {os.path.basename(backups[-1])}"
+
+    target = os.path.join(backup_dir, f"{stem}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+    partial = target + ".partial"
+
+    state = {"remaining": None, "restarts": 0}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        state["remaining"] = remaining
+
+    source = sqlite3.connect(path, timeout=5)
+    try:
+        destination = sqlite3.connect(partial)
+        try:
+            try:
+                source.backup(destination, pages=BACKUP_STEP_PAGES, progress=progress, sleep=STEP_PAUSE)
+            except _BackupRestarted:
+                source.backup(destination)
+        finally:
+            destination.close()
+        os.replace(partial, target)
+    finally:
+        source.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    cutoff = time.time() - retention_days * 86400
+    removed = 0
+    for old in backups:
+        if os.path.getmtime(old) < cutoff:
+            os.remove(old)
+            removed += 1
+
+    size = os.path.getsize(target) / 1024
+    return f"{os.path.basename(target)} ({size:.0f} KB), {removed} old backup(s) removed"
+
+
+def tenant_backup_dir(tenant):
+    """Backups of the default database go to BACKUP_DIR, tenant ones to BACKUP_DIR/tenants"""
+    from database import DEFAULT_TENANT
+    return BACKUP_DIR if tenant in (None, DEFAULT_TENANT) else os.path.join(BACKUP_DIR, "tenants")
+
+
+def for_each_database(targets, func):
+    """
+    Run func on each (tenant, target) pair and combine the results
+
+    A failing tenant does not stop the others; the errors are raised together at the end.
+    """
+    results, errors = [], []
+    for tenant, target in targets:
+        try:
+            results.append(f"{tenant}: {func(tenant, target)}")
+        except Exception as e:
+            errors.append(f"{tenant}: {type(e).__name__}: {e}")
+    if errors:
+        raise RuntimeError(" | ".join(errors + results))
+    if len(results) == 1:
+        return results[0].split(": ", 1)[1]
+    return " | ".join(results)
+
+
+class MaintenanceScheduler:
+    """Thread running maintenance tasks on their intervals, one at a time"""
+
+    def __init__(self, is_busy=None, history_size=100):
+        """
+        Args:
+            is_busy: Optional callable; tasks are postponed while it returns True
+            history_size (int): Number of past runs kept for the admin endpoint
+        """
+        self.is_busy = is_busy
+        self.tasks = {}
+        self.history = collections.deque(maxlen=history_size)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+    def add_task(self, name, func, interval, first_delay=START_DELAY):
+        """
+        Register a task
+
+        Args:
+            name (str): Task name
+            func: Callable without arguments returning a short result text
+            interval (float): Seconds between runs (0 or less: only run on demand)
+            first_delay (float): Seconds before the first run
+        """
+        with self._condition:
+            self.tasks[name] = {
+                "func": func,
+                "interval": interval,
+                "nextRun": time.time() + first_delay if interval > 0 else None,
+                "postponedSince": None,
+                "runs": 0,
+                "last": None,
+            }
+            self._condition.notify()
+
+    def start(self):
+        """Start the scheduler thread (no-op if already running)"""
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._worker, name="maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the scheduler thread (waits for a running task)"""
+        with self._condition:
+            thread = self._thread
+            self._thread = None
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout)
+
+    def run_now(self, name):
+        """
+        Schedule a task for immediate execution
+
+        Raises:
+            KeyError: If the task does not exist
+        """
+        with self._condition:
+            task = self.tasks[name]
+            task["nextRun"] = time.time()
+            task["postponedSince"] = None
+            self._condition.notify()
+
+    def _next_task(self):
+        due = [(task["nextRun"], name) for name, task in self.tasks.items() if task["nextRun"] is not None]
+        return min(due) if due else (None, None)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    next_run, name = self._next_task()
+                    wait = None if next_run is None else next_run - time.time()
+                    if wait is not None and wait <= 0:
+                        break
+                    self._condition.wait(wait)
+                if self._stopping:
+                    return
+                task = self.tasks[name]
+
+                # Let pending writes go first, for at most MAX_POSTPONE seconds
+                now = time.time()
+                if self.is_busy is not None and self.is_busy():
+                    task["postponedSince"] = task["postponedSince"] or now
+                    if now - task["postponedSince"] < MAX_POSTPONE:
+                        task["nextRun"] = now + POSTPONE_STEP
+                        continue
+                task["postponedSince"] = None
+
+            self._run(name, task)
+
+    def _run(self, name, task):
+        started = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            detail = task["func"]()
+            status = "ok"
+        except Exception as e:
+            detail = f"{type(e).__name__}: {e}"
+            status = "error"
+        entry = {
+            "task": name,
+            "startedAt": started.isoformat(),
+            "durationMs": round((time.perf_counter() - start) * 1000, 1),
+            "status": status,
+            "detail": detail,
+        }
+
+        with self._condition:
+            self.history.append(entry)
+            task["runs"] += 1
+            task["last"] = entry
+            task["nextRun"] = time.time() + task["interval"] if task["interval"] > 0 else None
+
+    def status(self):
+        """Tasks with their schedule and last run, and the run history (newest first)"""
+        with self._condition:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "tasks": [
+                    {
+                        "name": name,
+                        "interval": task["interval"],
+                        "nextRun": datetime.utcfromtimestamp(task["nextRun"]).isoformat()
+                        if task["nextRun"] is not None else None,
+                        "runs": task["runs"],
+                        "lastRun": task["last"],
+                    }
+                    for name, task in self.tasks.items()
+                ],
+                "history": list(reversed(self.history)),
+            }
+
+
+def add_database_tasks(scheduler, engines, database_files):
+    """
+    Register the optimize, checkpoint, vacuum and backup tasks
+
+    Args:
+        engines: Callable returning the (tenant, engine) pairs to maintain
+        database_files: Callable returning the (tenant, path) pairs to back up
+    """
+    scheduler.add_task(
+        "optimize", lambda: for_each_database(engines(), lambda t, e: run_optimize(e)),
+        task_interval("optimize"))
+    scheduler.add_task(
+        "checkpoint", lambda: for_each_database(engines(), lambda t, e: run_checkpoint(e)),
+        task_interval("checkpoint"))
+    scheduler.add_task(
+        "vacuum", lambda: for_each_database(engines(), lambda t, e: run_incremental_vacuum(e)),
+        task_interval("vacuum"))
+    scheduler.add_task(
+        "backup", lambda: for_each_database(database_files(), lambda t, p: run_backup(p, tenant_backup_dir(t))),
+        task_interval("backup"), first_delay=task_interval("backup"))
+
+
+def main():
+    from database import get_engine, init_db, use_tenant
+
+    parser = argparse.ArgumentParser(
+        description="Maintenance de la base SQLite (statistiques, vacuum, checkpoint WAL, sauvegarde)"
+    )
+    parser.add_argument(
+        'tasks',
+        nargs='+',
+        choices=['optimize', 'checkpoint', 'vacuum', 'backup'],
+        help='Tâches à exécuter'
+    )
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='vacuum : VACUUM complet activant auto_vacuum=INCREMENTAL (bloque les écritures)'
+    )
+    parser.add_argument(
+        '-t', '--tenant',
+        help='Base du tenant à maintenir (par défaut: base principale)'
+    )
+    args = parser.parse_args()
+
+    try:
+        use_tenant(args.tenant)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    engine = get_engine()
+    init_db(engine)
+    runners = {
+        "optimize": run_optimize,
+        "checkpoint": run_checkpoint,
+        "vacuum": run_full_vacuum if args.full else run_incremental_vacuum,
+        "backup": lambda e: run_backup(e.url.database, tenant_backup_dir(args.tenant)),
+    }
+
+    failed = False
+    for name in args.tasks:
+        start = time.perf_counter()
+        try:
+            detail = runners[name](engine)
+        except Exception as e:
+            print(f"❌ {name} : {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"✅ {name} ({(time.perf_counter() - start) * 1000:.0f} ms) : {detail}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
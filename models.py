@@ -1,10 +1,17 @@
 """
 Pydantic models for data validation
 """
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+import re
+
+from pydantic import BaseModel, ConfigDict, Field, EmailStr, field_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+from database import normalize_phone
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+PHONE_RE = re.compile(r"^\+?\d{4,20}$")
+
 
 class Event(BaseModel):
     """Model for an event in the timeline"""
@@ -42,6 +49,51 @@ class ContactCreate(ContactBase):
     pass
 
 
+class ContactImportRow(ContactCreate):
+    """Contact row of a CSV/vCard import, normalized on validation"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    name: str = Field(..., min_length=1)
+    contactId: Optional[str] = None
+    phone: Optional[str] = None
+    # Factories instead of [] defaults: avoids a deep copy per field and row
+    events: List[Event] = Field(default_factory=list)
+    nextActions: List[NextAction] = Field(default_factory=list)
+    opportunities: List[Opportunity] = Field(default_factory=list)
+
+    @field_validator("contactId", "email", "phone", "company", "position", mode="before")
+    @classmethod
+    def _blank_to_none(cls, value):
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    @field_validator("name", "company", "position")
+    @classmethod
+    def _collapse_spaces(cls, value):
+        return " ".join(value.split()) if value else value
+
+    @field_validator("email")
+    @classmethod
+    def _normalize_email(cls, value):
+        if value is None:
+            return None
+        value = value.lower()
+        if not EMAIL_RE.match(value):
+            raise ValueError("invalid email address")
+        return value
+
+    @field_validator("phone")
+    @classmethod
+    def _normalize_phone(cls, value):
+        if value is None:
+            return None
+        value = normalize_phone(value)
+        if not value or not PHONE_RE.match(value):
+            raise ValueError("invalid phone number")
+        return value
+
+
 class ContactUpdate(BaseModel):
     """Model for updating a contact (all fields optional)"""
     name: Optional[str] = None
@@ -57,7 +109,53 @@ class ContactUpdate(BaseModel):
 class ContactResponse(ContactBase):
     """Response model for a contact (with ID and date)"""
     contactId: str
+    archivedEventCount: int = 0
     createdAt: str
+    eventCount: Optional[int] = None
+    lastEventAt: Optional[str] = None
+    nextDueDate: Optional[str] = None
+    opportunityValue: Optional[float] = None
 
     class Config:
         from_attributes = True
+
+
+class ContactSuggestion(BaseModel):
+    """Autocomplete entry for a contact"""
+    contactId: str
+    name: str
+    company: Optional[str] = None
+    email: Optional[str] = None
+
+
+class ArchivedEventsPage(BaseModel):
+    """Page of a contact's archived events"""
+    contactId: str
+    total: int
+    offset: int
+    limit: int
+    events: List[Event]
+
+
+class TimelineEvent(Event):
+    """Event of the global timeline, with its contact"""
+    contactId: str
+    contactName: str
+
+
+class TimelinePage(BaseModel):
+    """Page of the global timeline (keyset pagination)"""
+    events: List[TimelineEvent]
+    nextCursor: Optional[str] = None
+
+
+class ContactBatchGetRequest(BaseModel):
+    """Request for fetching several contacts by ID"""
+    contactIds: List[str] = Field(..., max_length=10000)
+    fields: Optional[List[str]] = None
+
+
+class ContactBatchGetResponse(BaseModel):
+    """Contacts found (in request order) and IDs that do not exist"""
+    contacts: List[Dict[str, Any]]
+    missing: List[str]
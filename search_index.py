@@ -0,0 +1,163 @@
+"""
+In-memory prefix index over contact names, companies and emails
+
+Backs the autocomplete endpoint: every contact contributes a few normalized
+keys (each word of its name and company, its email and the email's local
+part) to one sorted array, so a prefix lookup is a bisect plus a short scan.
+Full names are also kept in a second sorted array: they rank first and must
+not be crowded out of the scan by a common company or word prefix.
+"""
+import bisect
+import threading
+import unicodedata
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Éric' matches 'eric'"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+class IndexEntry:
+    """Fields returned by the autocomplete endpoint for one contact"""
+    __slots__ = ("contactId", "name", "company", "email", "sortName", "keys")
+
+    def __init__(self, contactId, name, company=None, email=None):
+        self.contactId = contactId
+        self.name = name
+        self.company = company
+        self.email = email
+        self.sortName = normalize(name)
+        self.keys = self._build_keys()
+
+    def _build_keys(self):
+        keys = set()
+        for field in (self.name, self.company):
+            words = normalize(field).split()
+            keys.update(words)
+            if len(words) > 1:
+                keys.add(" ".join(words))
+        email = normalize(self.email)
+        if email:
+            keys.add(email)
+            keys.add(email.split("@")[0])
+        return tuple(sorted(keys))
+
+    def to_dict(self):
+        return {
+            "contactId": self.contactId,
+            "name": self.name,
+            "company": self.company,
+            "email": self.email
+        }
+
+
+class NameIndex:
+    """Sorted (key, contactId) array with prefix search"""
+
+    def __init__(self):
+        self._keys = []  # sorted list of (key, contactId)
+        self._names = []  # sorted list of (sortName, contactId)
+        self._entries = {}  # contactId -> IndexEntry
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def build(self, rows):
+        """
+        (Re)build the index from (contactId, name, company, email) rows
+
+        Args:
+            rows: Iterable of 4-tuples, e.g. a column-only SQLAlchemy query
+        """
+        entries = {row[0]: IndexEntry(*row) for row in rows}
+        keys = sorted(
+            (key, entry.contactId)
+            for entry in entries.values()
+            for key in entry.keys
+        )
+        names = sorted((entry.sortName, entry.contactId) for entry in entries.values())
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._names = names
+
+    def upsert(self, contact):
+        """Add or refresh a contact from its to_dict() representation"""
+        entry = IndexEntry(
+            contact["contactId"], contact["name"],
+            contact.get("company"), contact.get("email")
+        )
+        with self._lock:
+            self._remove(entry.contactId)
+            self._entries[entry.contactId] = entry
+            for key in entry.keys:
+                bisect.insort(self._keys, (key, entry.contactId))
+            bisect.insort(self._names, (entry.sortName, entry.contactId))
+
+    def remove(self, contact_id):
+        """Drop a contact from the index"""
+        with self._lock:
+            self._remove(contact_id)
+
+    def _remove(self, contact_id):
+        entry = self._entries.pop(contact_id, None)
+        if entry is None:
+            return
+        for key in entry.keys:
+            _delete(self._keys, (key, contact_id))
+        _delete(self._names, (entry.sortName, contact_id))
+
+    def suggest(self, query, limit=10, scan_limit=200):
+        """
+        Return the best matching contacts for a prefix
+
+        Contacts whose full name starts with the query come first, then
+        other prefix matches (word of name/company, email), each group
+        sorted by name.
+
+        Args:
+            query (str): Prefix typed by the user
+            limit (int): Maximum number of results
+            scan_limit (int): Maximum number of keys examined for the other matches
+
+        Returns:
+            list: Matching entries as dictionaries
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            # Full-name matches, already in name order
+            names = self._names
+            start = bisect.bisect_left(names, (prefix,))
+            matches = {}
+            for sort_name, contact_id in names[start:start + limit]:
+                if not sort_name.startswith(prefix):
+                    break
+                matches[contact_id] = self._entries[contact_id]
+            ranked = list(matches.values())
+
+            others = {}
+            if len(ranked) < limit:
+                keys = self._keys
+                start = bisect.bisect_left(keys, (prefix,))
+                for key, contact_id in keys[start:start + scan_limit]:
+                    if not key.startswith(prefix):
+                        break
+                    if contact_id not in matches and contact_id not in others:
+                        others[contact_id] = self._entries[contact_id]
+
+        ranked.extend(sorted(others.values(), key=lambda e: e.sortName))
+        return [entry.to_dict() for entry in ranked[:limit]]
+
+
+def _delete(array, item):
+    """Remove item from a sorted array, if present"""
+    i = bisect.bisect_left(array, item)
+    if i < len(array) and array[i] == item:
+        del array[i]
@@ -5,13 +5,58 @@ class ContactManager {
         this.contacts = [];
         this.currentContact = null;
         this.expandedCards = new Set(); // Track which cards are expanded
+        this.pageSize = 50; // Contacts fetched per page
+        this.searchQuery = '';
+        this.hasMore = true;
+        this.loadingMore = false;
+        this.abortController = null; // Cancels the in-flight list request
+        this.searchTimer = null;
+        this.searchDelay = 250; // ms of typing pause before searching
+        this.apiBase = document.body.dataset.apiBase || ''; // "/t/{tenant}" under a tenant prefix
+        this.liveUpdates = false; // True while the change feed (SSE) is connected
         this.init();
     }
 
     async init() {
         this.setupEventListeners();
+        this.setupInfiniteScroll();
         await this.loadContacts();
         await this.loadStats();
+        this.connectChanges();
+    }
+
+    connectChanges() {
+        // Flux des modifications (Server-Sent Events) : la liste et les
+        // statistiques sont mises à jour sans recharger, y compris pour les
+        // changements faits dans d'autres onglets
+        if (!('EventSource' in window)) return;
+        const source = new EventSource(`${this.apiBase}/api/changes`);
+        let disconnected = false;
+
+        source.addEventListener('open', () => {
+            this.liveUpdates = true;
+            // Les statistiques ne sont pas rejouées après une coupure
+            if (disconnected) this.loadStats();
+        });
+        source.addEventListener('error', () => {
+            // EventSource se reconnecte seul (en envoyant Last-Event-ID)
+            this.liveUpdates = false;
+            disconnected = true;
+        });
+        source.addEventListener('contact', (e) => {
+            const change = JSON.parse(e.data);
+            if (change.op === 'delete') {
+                this.removeContact(change.contactId);
+            } else {
+                this.upsertContact(change.contact, change.op === 'create');
+            }
+        });
+        source.addEventListener('stats', (e) => this.renderStats(JSON.parse(e.data)));
+        source.addEventListener('resync', () => {
+            // Trop de changements manqués : tout recharger
+            this.loadContacts();
+            this.loadStats();
+        });
     }
 
     setupEventListeners() {
@@ -20,9 +65,10 @@ class ContactManager {
             this.openModal();
         });
 
-        // Recherche
+        // Recherche (différée jusqu'à une pause de frappe)
         document.getElementById('searchInput').addEventListener('input', (e) => {
-            this.searchContacts(e.target.value);
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.searchContacts(e.target.value), this.searchDelay);
         });
 
         // Fermeture modale
@@ -53,31 +99,98 @@ class ContactManager {
         document.getElementById('collapseAllBtn')?.addEventListener('click', () => this.collapseAll());
     }
 
-    async loadContacts(search = '') {
+    setupInfiniteScroll() {
+        // Charger la page suivante quand la sentinelle devient visible
+        const sentinel = document.getElementById('contactsSentinel');
+        if (!sentinel || !('IntersectionObserver' in window)) return;
+        const observer = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.loadMoreContacts();
+            }
+        }, { rootMargin: '600px' });
+        observer.observe(sentinel);
+    }
+
+    async fetchContactsPage(offset, signal) {
+        const params = new URLSearchParams({ limit: this.pageSize, offset });
+        if (this.searchQuery) {
+            params.set('search', this.searchQuery);
+        }
+        const response = await fetch(`${this.apiBase}/api/contacts?${params}`, { signal });
+        const page = await response.json();
+        this.hasMore = page.length === this.pageSize;
+        return page;
+    }
+
+    async loadContacts(search = this.searchQuery) {
+        // Annuler la requête précédente : seule la dernière recherche compte
+        this.abortController?.abort();
+        const controller = new AbortController();
+        this.abortController = controller;
+        this.searchQuery = search;
+
         try {
-            const url = search ? `/api/contacts?search=${encodeURIComponent(search)}` : '/api/contacts';
-            const response = await fetch(url);
-            this.contacts = await response.json();
+            this.contacts = await this.fetchContactsPage(0, controller.signal);
             this.renderContacts();
         } catch (error) {
+            if (error.name === 'AbortError') return;
             console.error('Erreur lors du chargement des contacts:', error);
             this.showError('Erreur lors du chargement des contacts');
+        } finally {
+            if (this.abortController === controller) {
+                this.abortController = null;
+            }
+        }
+    }
+
+    async loadMoreContacts() {
+        // Pas de page suivante pendant qu'une nouvelle liste est chargée
+        if (!this.hasMore || this.loadingMore || this.abortController || this.contacts.length === 0) return;
+        this.loadingMore = true;
+        const controller = new AbortController();
+        this.abortController = controller;
+
+        try {
+            const loaded = new Set(this.contacts.map(c => c.contactId));
+            // Une suppression faite ailleurs décale les pages : ignorer les doublons
+            const page = (await this.fetchContactsPage(this.contacts.length, controller.signal))
+                .filter(c => !loaded.has(c.contactId));
+            this.contacts.push(...page);
+            this.appendContacts(page);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Erreur lors du chargement des contacts:', error);
+            }
+        } finally {
+            this.loadingMore = false;
+            if (this.abortController === controller) {
+                this.abortController = null;
+            }
         }
     }
 
     async loadStats() {
         try {
-            const response = await fetch('/api/stats');
-            const stats = await response.json();
-            document.getElementById('totalContacts').textContent = stats.totalContacts;
-            document.getElementById('totalOpportunites').textContent = stats.totalOpportunities;
-            document.getElementById('valeurTotale').textContent = 
-                new Intl.NumberFormat('fr-FR', { style: 'currency', currency: 'EUR' }).format(stats.totalOpportunitiesValue);
+            const response = await fetch(`${this.apiBase}/api/stats`);
+            if (response.status === 503) {
+                // Serveur chargé : réessayer après le délai indiqué
+                const delay = Number(response.headers.get('Retry-After')) || 1;
+                setTimeout(() => this.loadStats(), delay * 1000);
+                return;
+            }
+            this.renderStats(await response.json());
         } catch (error) {
             console.error('Erreur lors du chargement des statistiques:', error);
         }
     }
 
+    renderStats(stats) {
+        document.getElementById('totalContacts').textContent = stats.totalContacts;
+        document.getElementById('totalOpportunites').textContent = stats.totalOpportunities;
+        document.getElementById('valeurTotale').textContent = 
+            new Intl.NumberFormat('fr-FR', { style: 'currency', currency: 'EUR' }).format(stats.totalOpportunitiesValue);
+    }
+
     renderContacts() {
         const container = document.getElementById('contactsContainer');
         
@@ -92,9 +205,18 @@ class ContactManager {
             return;
         }
 
-        container.innerHTML = this.contacts.map(contact => {
-            const isExpanded = this.expandedCards.has(contact.contactId);
-            return `
+        container.innerHTML = this.contacts.map(contact => this.renderContactCard(contact)).join('');
+    }
+
+    appendContacts(contacts) {
+        // Ajouter seulement les nouvelles cartes, sans reconstruire la liste
+        const container = document.getElementById('contactsContainer');
+        container.insertAdjacentHTML('beforeend', contacts.map(contact => this.renderContactCard(contact)).join(''));
+    }
+
+    renderContactCard(contact) {
+        const isExpanded = this.expandedCards.has(contact.contactId);
+        return `
             <div class="contact-card" data-id="${contact.contactId}">
                 <div class="contact-header">
                     <div>
@@ -160,7 +282,54 @@ class ContactManager {
                 ` : ''}
             </div>
         `;
-        }).join('');
+    }
+
+    matchesSearch(contact) {
+        // Même critère que le paramètre search de l'API
+        if (!this.searchQuery) return true;
+        const query = this.searchQuery.toLowerCase();
+        return [contact.name, contact.email, contact.company, contact.position]
+            .some(value => value && value.toLowerCase().includes(query));
+    }
+
+    upsertContact(contact, created) {
+        // Remplacer la carte d'un contact affiché, ou ajouter un contact créé
+        // en tête (la liste est triée du plus récent au plus ancien). Un
+        // contact modifié pas encore chargé arrivera avec sa page.
+        const index = this.contacts.findIndex(c => c.contactId === contact.contactId);
+        if (index !== -1) {
+            this.contacts[index] = contact;
+            this.rerenderCard(contact.contactId);
+            return;
+        }
+        if (!created || !this.matchesSearch(contact)) return;
+        this.contacts.unshift(contact);
+        if (this.contacts.length === 1) {
+            this.renderContacts();
+        } else {
+            document.getElementById('contactsContainer')
+                .insertAdjacentHTML('afterbegin', this.renderContactCard(contact));
+        }
+    }
+
+    removeContact(contactId) {
+        const index = this.contacts.findIndex(c => c.contactId === contactId);
+        if (index === -1) return;
+        this.contacts.splice(index, 1);
+        this.expandedCards.delete(contactId);
+        if (this.contacts.length === 0) {
+            this.renderContacts();
+        } else {
+            document.querySelector(`.contact-card[data-id="${contactId}"]`)?.remove();
+        }
+    }
+
+    rerenderCard(contactId) {
+        const card = document.querySelector(`.contact-card[data-id="${contactId}"]`);
+        const contact = this.contacts.find(c => c.contactId === contactId);
+        if (card && contact) {
+            card.outerHTML = this.renderContactCard(contact);
+        }
     }
 
     openModal(contact = null) {
@@ -273,14 +442,14 @@ class ContactManager {
             let response;
             if (this.currentContact) {
                 // Mise à jour
-                response = await fetch(`/api/contacts/${this.currentContact.contactId}`, {
+                response = await fetch(`${this.apiBase}/api/contacts/${this.currentContact.contactId}`, {
                     method: 'PUT',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(formData)
                 });
             } else {
                 // Création
-                response = await fetch('/api/contacts', {
+                response = await fetch(`${this.apiBase}/api/contacts`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(formData)
@@ -288,10 +457,12 @@ class ContactManager {
             }
 
             if (response.ok) {
+                const isUpdate = Boolean(this.currentContact);
+                this.upsertContact(await response.json(), !isUpdate);
                 this.closeModal();
-                await this.loadContacts();
-                await this.loadStats();
-                this.showSuccess(this.currentContact ? 'Contact modifié avec succès' : 'Contact créé avec succès');
+                // Avec le flux des modifications, les statistiques arrivent seules
+                if (!this.liveUpdates) await this.loadStats();
+                this.showSuccess(isUpdate ? 'Contact modifié avec succès' : 'Contact créé avec succès');
             } else {
                 throw new Error('Erreur lors de la sauvegarde');
             }
@@ -333,7 +504,7 @@ class ContactManager {
 
     async editContact(contactId) {
         try {
-            const response = await fetch(`/api/contacts/${contactId}`);
+            const response = await fetch(`${this.apiBase}/api/contacts/${contactId}`);
             const contact = await response.json();
             this.openModal(contact);
         } catch (error) {
@@ -348,13 +519,13 @@ class ContactManager {
         }
 
         try {
-            const response = await fetch(`/api/contacts/${contactId}`, {
+            const response = await fetch(`${this.apiBase}/api/contacts/${contactId}`, {
                 method: 'DELETE'
             });
 
             if (response.ok) {
-                await this.loadContacts();
-                await this.loadStats();
+                this.removeContact(contactId);
+                if (!this.liveUpdates) await this.loadStats();
                 this.showSuccess('Contact supprimé avec succès');
             } else {
                 throw new Error('Erreur lors de la suppression');
@@ -375,12 +546,13 @@ class ContactManager {
         } else {
             this.expandedCards.add(contactId);
         }
-        this.renderContacts();
+        this.rerenderCard(contactId);
     }
 
     collapseAll() {
+        const expanded = [...this.expandedCards];
         this.expandedCards.clear();
-        this.renderContacts();
+        expanded.forEach(contactId => this.rerenderCard(contactId));
     }
 
     formatDate(dateStr) {
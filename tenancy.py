@@ -0,0 +1,58 @@
+"""
+Tenant routing for the API
+
+Each request is routed to its tenant's database, taken from:
+- the X-Tenant-ID header:  GET /api/contacts  with  X-Tenant-ID: acme
+- or a path prefix:        GET /t/acme/api/contacts  (also serves the UI at /t/acme/)
+
+Requests without either use the default database. The tenant is stored in
+database.current_tenant for the duration of the request, so get_db() and
+get_session() open the right database. Unknown tenants get a 404: tenant
+databases are only created by `python init_db.py --tenant <id>`, never by a
+request (a typo must not create an empty CRM).
+"""
+from fastapi.responses import JSONResponse
+
+from database import current_tenant, set_current_tenant, tenant_exists
+
+TENANT_HEADER = b"x-tenant-id"
+TENANT_PREFIX = "/t/"
+
+
+class TenantMiddleware:
+    """ASGI middleware selecting the tenant of each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        tenant = None
+        root_path = scope.get("root_path", "")
+        path = scope["path"]
+        if path.startswith(root_path + TENANT_PREFIX):
+            # /t/acme/api/contacts: mount the rest of the path under /t/acme
+            tenant = path[len(root_path + TENANT_PREFIX):].split("/", 1)[0]
+            scope = dict(scope, root_path=f"{root_path}{TENANT_PREFIX}{tenant}")
+        else:
+            for name, value in scope["headers"]:
+                if name == TENANT_HEADER:
+                    tenant = value.decode("latin-1").strip()
+                    break
+
+        try:
+            token = set_current_tenant(tenant)
+        except ValueError as e:
+            response = JSONResponse({"detail": str(e)}, status_code=400)
+            return await response(scope, receive, send)
+        if not tenant_exists(current_tenant.get()):
+            current_tenant.reset(token)
+            response = JSONResponse({"detail": f"Unknown tenant '{tenant}'"}, status_code=404)
+            return await response(scope, receive, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tenant.reset(token)
@@ -0,0 +1,166 @@
+"""
+Single-writer queues that group contact writes into shared commits
+
+SQLite only allows one writer at a time and every commit costs an fsync.
+Instead of letting each request open its own transaction, write jobs are
+queued and executed by one background thread per database: the jobs
+waiting in the queue are applied in a single transaction (one SAVEPOINT per
+job, so a failing job does not abort its neighbours) and committed once.
+
+Batches form by draining the queue: jobs submitted while a batch commits go
+in the next one, so the busier the database the larger the group commits,
+while a lone write is applied at once. A job waits at most for the commit
+in progress (plus `linger`, 0 by default).
+
+Jobs carry a key (the tenant) selecting their database. Each key has its
+own queue and writer thread, started on its first job and closed with
+close(key): SQLite locks a whole database file, so a tenant whose database
+is busy or locked only holds up its own writes.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """Background writers applying queued jobs in group commits, one per key"""
+
+    def __init__(self, session_factory, linger=0.0, max_batch=256):
+        """
+        Args:
+            session_factory: Callable returning a new SQLAlchemy session,
+                             called with the job key when one is given
+            linger (float): Time (s) a batch may wait for more jobs once the
+                            queue is drained (0: commit what is queued)
+            max_batch (int): Maximum number of jobs committed together
+        """
+        self.session_factory = session_factory
+        self.linger = linger
+        self.max_batch = max_batch
+        self._lanes = {}  # key -> (queue, writer thread)
+        self._lock = threading.Lock()
+        self.stats = {"jobs": 0, "batches": 0, "failedBatches": 0}
+
+    def stop(self, timeout=5.0):
+        """Flush pending jobs and stop every writer thread"""
+        with self._lock:
+            lanes = list(self._lanes.values())
+            self._lanes.clear()
+            for jobs, _ in lanes:
+                jobs.put(None)
+        deadline = time.monotonic() + timeout
+        for _, thread in lanes:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def close(self, key):
+        """Stop the writer of a key once its pending jobs are applied (e.g. tenant closed)"""
+        with self._lock:
+            lane = self._lanes.pop(key, None)
+            if lane is not None:
+                lane[0].put(None)
+
+    def submit(self, job, key=None):
+        """
+        Queue a write job
+
+        Args:
+            job: Callable taking the writer session; its return value is
+                 delivered once the enclosing batch has been committed
+            key: Passed to session_factory to pick the job's database
+
+        Returns:
+            concurrent.futures.Future: Result (or exception) of the job
+        """
+        future = Future()
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                jobs = queue.Queue()
+                thread = threading.Thread(
+                    target=self._worker, args=(jobs, key),
+                    name=f"write-queue-{key}" if key is not None else "write-queue", daemon=True)
+                lane = self._lanes[key] = (jobs, thread)
+                thread.start()
+            lane[0].put((job, future))
+        return future
+
+    @property
+    def pending(self):
+        """Number of jobs waiting to be applied"""
+        with self._lock:
+            return sum(jobs.qsize() for jobs, _ in self._lanes.values())
+
+    async def run(self, job, key=None):
+        """Queue a write job and wait for its committed result"""
+        return await asyncio.wrap_future(self.submit(job, key))
+
+    def _worker(self, jobs, key):
+        while True:
+            item = jobs.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = jobs.get(timeout=remaining) if remaining > 0 \
+                        else jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit_batch(batch, key)
+            if stop:
+                return
+
+    def _commit_batch(self, batch, key=None):
+        done = []
+        try:
+            db = self.session_factory(key) if key is not None else self.session_factory()
+        except Exception as e:
+            # e.g. the tenant database cannot be opened
+            self._count(failedBatches=1)
+            for _, future in batch:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        try:
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.begin_nested():
+                        result = job(db)
+                except Exception as e:
+                    future.set_exception(e)
+                else:
+                    done.append((future, result))
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self._count(failedBatches=1)
+            for future, _ in done:
+                future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self._count(jobs=len(batch), batches=1)
+        for future, result in done:
+            future.set_result(result)
+
+    def _count(self, **increments):
+        # Writers of different keys update the stats concurrently
+        with self._lock:
+            for name, value in increments.items():
+                self.stats[name] += value